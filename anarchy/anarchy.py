@@ -1,16 +1,25 @@
 import math
 from random import triangular as triforce
-from typing import List
 
-from rlbot.agents.base_agent import BaseAgent, SimpleControllerState
+from rlbot.agents.base_agent import BaseAgent, SimpleControllerState, BOT_CONFIG_AGENT_HEADER
+from rlbot.parsing.custom_config import ConfigObject, ConfigHeader
 from rlbot.utils.structures.game_data_struct import GameTickPacket
-from rlbot.utils.structures.ball_prediction_struct import BallPrediction, Slice
 
 from utilities.vectors import *
-from utilities.render_mesh import unzip_and_make_mesh, ColoredWireframe
+from utilities.render_mesh import load_mesh, ColoredWireframe
 from utilities.quick_chat_handler import QuickChatHandler
 from utilities.matrix import Matrix3D
 from utilities.aerial import aerial_option_b as Aerial
+from utilities.boost import BoostPadTracker
+from utilities.car_tracker import CarTracker
+from utilities.deadline import TickBudget, Degradation
+from utilities.planner import Plan, Planner, make_plan, estimate_max_speed, MAX_PLAN_AGE
+from utilities.tuning import Tuning
+from utilities.telemetry import Telemetry
+from utilities.kickoff import Kickoff
+from utilities.maneuvers import ManeuverSequencer, aim_at
+from utilities.steering import steer_toward, path_length, corner_speed, MIN_CORNER_SPEED
+from utilities.gc_control import GcControl
 
 # first!
 
@@ -37,35 +46,86 @@ class Anarchy(BaseAgent):
     def __init__(self, name, team, index):
         super().__init__(name, team, index)
         self.controller = SimpleControllerState()
-        self.dodging = False
-        self.halfflipping = False
-        self.dodge_pitch = 0
-        self.dodge_roll = 0
         self.time = 0
-        self.next_dodge_time = 0
         self.quick_chat_handler: QuickChatHandler = QuickChatHandler(self)
-        self.zero_two: ColoredWireframe = unzip_and_make_mesh("nothing.zip", "zerotwo.obj")
+        self.zero_two: ColoredWireframe = load_mesh("zerotwo.mesh")
         self.aerial: Aerial = None
+        self.boost_pads: BoostPadTracker = BoostPadTracker()
+        self.cars: CarTracker = CarTracker()
+        self.budget: TickBudget = TickBudget()
+        self.next_report_time = 60
+        self.tuning: Tuning = Tuning()
+        self.plan: Plan = None
+        self.planner: Planner = None  # Only used in pipelined mode
+        self.destination: Vector2 = None
+        self.impact_projection: Vector2 = None
+        self.avoid_own_goal = False
+        self.wait = False
+        self.backwards = False
+        self.maneuver_played = False  # Whether a maneuver set the controls this tick
+        self.telemetry: Telemetry = Telemetry()
+        self.kickoff: Kickoff = Kickoff()
+        self.maneuvers: ManeuverSequencer = ManeuverSequencer()
+        self.gc_control: GcControl = GcControl()
+
+    @staticmethod
+    def create_agent_configurations(config: ConfigObject):
+        params = config.get_header(BOT_CONFIG_AGENT_HEADER)
+        params.add_value('pipelined', bool, default=False,
+                         description='Plan in a background process, and only turn the newest plan into controls each tick')
+        params.add_value('deferred_gc', bool, default=False,
+                         description='Freeze startup objects and only collect garbage at the end of ticks with time to spare')
+
+    def load_config(self, config_header: ConfigHeader):
+        if config_header.getboolean('pipelined'):
+            self.planner = Planner(self.tuning, self.logger)
+        self.gc_control.deferred = config_header.getboolean('deferred_gc')
 
     def initialize_agent(self):
-        '''
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            tmpdir = Path(tmpdirname)
-            try:
-                with zipfile.ZipFile(Path(__file__).absolute().parent / 'nothing.zip', 'r') as zip_ref: zip_ref.extractall(tmpdir)
-            except:
-                with zipfile.ZipFile(str(Path(__file__).absolute().parent / 'nothing.zip'), 'r') as zip_ref: zip_ref.extractall(tmpdir)
-            self.color_groups = parse_obj_mesh_file(tmpdir / 'zerotwo.obj', 70)
-        self.polygons_rendered = 0
-        self.current_color_group = 0
-        '''
-        pass
+        self.boost_pads.load(self.get_field_info())
+        if self.planner is not None:
+            self.planner.start()
+        self.gc_control.start(self.budget)
+
+    def retire(self):
+        if self.planner is not None:
+            self.planner.stop()
+        self.gc_control.stop()
 
     def get_output(self, packet: GameTickPacket) -> SimpleControllerState:
-        self.quick_chat_handler.handle_quick_chats(packet)
+        self.budget.start()
+        try:
+            controller = self.get_controls(packet)
+            self.telemetry.append(self.time, self.car, packet.game_ball, self.destination, self.plan.impact, max(0, self.plan.impact_at - self.time),
+                                  self.wait, self.backwards, self.avoid_own_goal, controller,
+                                  self.maneuvers.timeline.id if self.maneuver_played else -1, self.maneuvers.frame if self.maneuver_played else -1)
+            self.telemetry.watch(packet, self.index)
+
+            # Everything below is optional, and only gets whatever is left of the tick's budget
+            self.budget.run("render", self.render, packet, cost=0.001)
+            if self.budget.run("mesh", self.zero_two.render, self.renderer, deadline=self.budget.deadline, cost=0.0005) is False:
+                self.budget.mark("mesh", Degradation.PARTIAL)
+            self.budget.run("quick_chats", self.quick_chat_handler.handle_quick_chats, packet, cost=0.0002)
+        finally:
+            # Even on ticks that raise, so deferred collections still happen and the tick still gets counted
+            self.gc_control.collect()
+            self.budget.end()
+
+        if self.time > self.next_report_time:
+            self.logger.info(self.budget.report())
+            self.next_report_time = self.time + 60
+        return controller
+
+    def get_controls(self, packet: GameTickPacket) -> SimpleControllerState:
+        # Kickoff and aerial ticks return early, so clear what telemetry records from the last tick first
+        self.destination = self.impact_projection = None
+        self.wait = self.backwards = self.avoid_own_goal = self.maneuver_played = False
 
         # Collect data from the packet
         self.time = packet.game_info.seconds_elapsed
+        self.boost_pads.update(packet)
+        ball_prediction = self.get_ball_prediction_struct()
+        self.cars.update(packet, ball_prediction)
         ball_location = Vector2(packet.game_ball.physics.location.x, packet.game_ball.physics.location.y)
         my_car = packet.game_cars[self.index]
         self.car = my_car
@@ -76,7 +136,27 @@ class Anarchy(BaseAgent):
         team_sign = (1 if my_car.team == 0 else -1)
         enemy_goal = Vector2(0, team_sign * 5120)
         kickoff = (ball_location.x == 0 and ball_location.y == 0)
-        impact, impact_time = get_impact(self.get_ball_prediction_struct(), self.car, Vector3(packet.game_ball.physics.location.x, packet.game_ball.physics.location.y, packet.game_ball.physics.location.z), self.renderer)
+        ball_position = Vector3(packet.game_ball.physics.location.x, packet.game_ball.physics.location.y, packet.game_ball.physics.location.z)
+        if self.kickoff.step(kickoff, packet.game_info.is_round_active, my_car, self.time, self.controller):
+            # Scripted kickoff, no planning needed
+            self.plan = Plan(self.time, ball_position, self.time, None, self.time, False)
+            return self.controller
+        pipelined_plan = self.planner.plan if self.planner is not None else None
+        if pipelined_plan is not None and self.time - pipelined_plan.game_time <= MAX_PLAN_AGE:
+            # Pipelined: use the newest finished plan, and let the planner start on this packet
+            self.plan = pipelined_plan
+            self.planner.submit(self.time, my_car, ball_position, ball_prediction)
+        else:
+            if self.planner is not None:
+                # The planner hasn't finished a plan yet, or has fallen behind, so plan here this tick
+                if pipelined_plan is not None:
+                    self.budget.mark("planner", Degradation.SKIPPED)
+                self.planner.submit(self.time, my_car, ball_position, ball_prediction)
+            # Only fall back to an old impact if it's recent
+            previous = self.plan if self.plan is not None and self.time - self.plan.impact_found_at < 0.25 else None
+            self.plan = make_plan(self.time, my_car, ball_position, ball_prediction, self.budget if previous is not None else None, previous, self.tuning)
+        impact = self.plan.impact
+        impact_time = max(0, self.plan.impact_at - self.time)
         rotation_matrix = Matrix3D([my_car.physics.rotation.pitch, my_car.physics.rotation.yaw, my_car.physics.rotation.roll])
         # Hi robbie!
 
@@ -87,17 +167,8 @@ class Anarchy(BaseAgent):
             return self.controller
         '''
 
-        # Handle bouncing
-        ball_bounces: List[Slice] = get_ball_bounces(self.get_ball_prediction_struct())
-        bounce_location = None
-        for b in ball_bounces:
-            time: float = b.game_seconds - self.time
-            if time < impact_time - 0.5:
-                continue
-            bounce_location: Vector2 = Vector2(b.physics.location)
-            break
-        if bounce_location is None:
-            time = 0
+        bounce_location = self.plan.bounce_location
+        time = max(0, self.plan.bounce_at - self.time)
 
         # Handle aerials
         if self.aerial is not None:
@@ -107,7 +178,7 @@ class Anarchy(BaseAgent):
             else:
                 # Get the output of the aerial
                 return self.aerial.execute()
-        elif self.aerial is None and time > 2.5 and impact.z > 500 and car_velocity.length < 1000 and team_sign * car_location.y < team_sign * ball_location.y:
+        elif self.aerial is None and self.plan.aerial:
             # Start a new aerial
             self.aerial = Aerial(self.time)
             return self.aerial.execute(packet, self.index)
@@ -115,51 +186,58 @@ class Anarchy(BaseAgent):
         # Set a destination for Anarchy to reach
         impact_projection = project_to_wall(car_location, impact.flatten() - car_location)
         avoid_own_goal = impact_projection.y * team_sign < -5000
-        wait = (packet.game_ball.physics.location.z > 200 and my_car.physics.location.z < 200)
+        # No time to wait for a bounce if an opponent will get there first
+        wait = (packet.game_ball.physics.location.z > 200 and my_car.physics.location.z < 200 and not self.cars.opponent_first(self.index)
+                and bounce_location is not None)
         if wait:
-            destination = bounce_location
+            # A copy, since the destination gets shifted in place below and the plan may be reused next tick
+            destination = Vector2(bounce_location.x, bounce_location.y)
         else:
             destination = impact.flatten()
         if kickoff:
             pass
         elif avoid_own_goal:
-            offset = (impact_time * 200 + 100)
+            offset = (impact_time * self.tuning.own_goal_offset_per_second + self.tuning.own_goal_offset)
             destination += Vector2(offset * -sign(impact_projection.x), 140 if wait else 0)
         elif abs(ball_location.x) < 750 or team_sign * car_location.y > team_sign * ball_location.y or (abs(ball_location.x) > 3200 and abs(ball_location.x) + 100 > abs(car_location.x)):
-            destination.y -= max(abs(car_to_ball.y) / 2.9, 70 if wait else 110) * team_sign
+            destination.y -= max(abs(car_to_ball.y) / self.tuning.shadow_divisor, 70 if wait else 110) * team_sign
         else:
-            destination += (destination - enemy_goal).normalized * max(car_to_ball.length / 3.4, 60 if wait else 100)
+            destination += (destination - enemy_goal).normalized * max(car_to_ball.length / self.tuning.offset_divisor, 60 if wait else 100)
+        if not (kickoff or wait or avoid_own_goal) and my_car.boost < 30 and impact_time > 1.5:
+            # Pick up boost on the way if it doesn't cost much time
+            pad = self.boost_pads.cheapest_detour(car_location, destination, min(1000, impact_time * 300), max(car_velocity.length, 1410))
+            if pad is not None:
+                destination = pad.location
         if abs(car_location.y > 5120): destination.x = min(700, max(-700, destination.x)) #Don't get stuck in goal
         car_to_destination = (destination - car_location)
-
-        # Rendering
-        self.renderer.begin_rendering()
-        # commented out due to performance concerns
-        # self.renderer.draw_polyline_3d([[car_location.x+triforce(-20,20), car_location.y+triforce(-20,20), triforce(shreck(200),200)] for i in range(40)], self.renderer.cyan())
-        self.renderer.draw_rect_2d(0, 0, 3840, 2160, True, self.renderer.create_color(64, 246, 74, 138))  # first bot that supports 4k resolution!
-        self.renderer.draw_string_2d(triforce(20, 50), triforce(10, 20), 5, 5, 'ALICE NAKIRI IS BEST GIRL', self.renderer.white())
-        self.renderer.draw_string_2d(triforce(20, 50), triforce(90, 100), 2, 2, '(zero two is a close second)', self.renderer.lime())
-        self.renderer.draw_string_2d(20, 100, 2, 2, "Max Speed: " + str(int(estimate_max_speed(self.car))), self.renderer.white())
-        self.renderer.draw_line_3d([destination.x, destination.y, impact.z], [impact.x, impact.y, impact.z], self.renderer.blue())
-        if avoid_own_goal: self.renderer.draw_line_3d([car_location.x, car_location.y, 0], [impact_projection.x, impact_projection.y, 0], self.renderer.yellow())
-        self.renderer.end_rendering()
-
-        self.zero_two.render(self.renderer)
+        self.destination, self.impact_projection, self.avoid_own_goal, self.wait = destination, impact_projection, avoid_own_goal, wait
 
         # Choose whether to drive backwards or not
         wall_touch = (distance_from_wall(impact.flatten()) < 250 and team_sign * impact.y < 4000)
         local = rotation_matrix.dot(Vector3(car_to_destination.x, car_to_destination.y, (impact.z if wall_touch else 17.010000228881836) - my_car.physics.location.z))
         steer_correction_radians = math.atan2(local.y, local.x)
         backwards = (math.cos(steer_correction_radians) < 0)
+        self.backwards = backwards
         if backwards:
             if steer_correction_radians != 0:
                 steer_correction_radians = -(steer_correction_radians - sign(steer_correction_radians) * math.pi)
             else:
                 steer_correction_radians = math.pi
 
-        # Speed control
-        target_velocity = (((bounce_location - car_location).length / time) if time > 0 else 2300)
-        velocity_change = (target_velocity - car_velocity.flatten().length)
+        # Steering
+        car_speed = car_velocity.flatten().length
+        turn, slide = steer_toward(steer_correction_radians, car_to_destination.length, car_speed)
+
+        # Speed control, along the path the car can actually turn on
+        if time > 0 and bounce_location is not None:
+            to_bounce = rotation_matrix.dot(Vector3(bounce_location.x - car_location.x, bounce_location.y - car_location.y, 0))
+            target_velocity = path_length(-to_bounce.x if backwards else to_bounce.x, to_bounce.y, car_speed) / time
+        else:
+            target_velocity = 2300
+        if not slide and abs(local.y) > 1:
+            # Slow down for corners too tight to make at this speed, but keep rolling for ones too tight to make at all
+            target_velocity = min(target_velocity, max(MIN_CORNER_SPEED, corner_speed((local.x ** 2 + local.y ** 2) / (2 * abs(local.y)))))
+        velocity_change = (target_velocity - car_speed)
         if velocity_change > 200 or target_velocity > 1410:
             self.controller.boost = (abs(steer_correction_radians) < 0.2 and not my_car.is_super_sonic and not backwards)
             self.controller.throttle = (1 if not backwards else -1)
@@ -170,66 +248,51 @@ class Anarchy(BaseAgent):
             self.controller.boost = False
             self.controller.throttle = (-1 if not backwards else 1)
 
-        # Steering
-        turn = clamp11(steer_correction_radians * 2)
         self.controller.steer = turn
-        self.controller.handbrake = (abs(turn) > 1 and not my_car.is_super_sonic)
+        self.controller.handbrake = (slide and not my_car.is_super_sonic)
 
         # Dodging
         self.controller.jump = False
+        on_wheels = my_car.has_wheel_contact
         dodge_for_speed = (velocity_change > 700 and not backwards and my_car.boost < 10 and car_to_destination.size > 1000 and abs(steer_correction_radians) < 0.1)
-        if (((car_to_ball.size < 300 and packet.game_ball.physics.location.z < 300) or dodge_for_speed) and car_velocity.size > 1200) or self.dodging:
-            dodge(self, car_direction.correction_to(car_to_destination if impact_time > 0.8 else car_to_ball), ball_location)
+        if ((car_to_ball.size < 300 and packet.game_ball.physics.location.z < 300) or dodge_for_speed) and car_velocity.size > 1200:
+            self.maneuvers.start("dodge", self.time, on_wheels, aim_at(car_direction.correction_to(car_to_destination if impact_time > 0.8 else car_to_ball)))
+
+        # Jump over incoming demos
+        if self.cars.demo_incoming(self.index):
+            self.maneuvers.start("hop", self.time, on_wheels)
 
         # Half-flips
-        if backwards and impact_time > 0.6 and car_velocity.size > 900 and abs(steer_correction_radians) < 0.1 or self.halfflipping:
-            halfflip(self)
+        if backwards and impact_time > 0.6 and car_velocity.size > 900 and abs(steer_correction_radians) < 0.1:
+            self.maneuvers.start("halfflip", self.time, on_wheels)
 
-        if not self.car.has_wheel_contact and not (self.dodging or self.halfflipping):  # Recovery
+        self.maneuver_played = self.maneuvers.step(self.time, on_wheels, self.controller)
+        if not self.maneuver_played and not on_wheels:  # Recovery
             self.controller.roll = clamp11(self.car.physics.rotation.roll * -0.7)
             self.controller.pitch = clamp11(self.car.physics.rotation.pitch * -0.7)
             self.controller.boost = False
 
         return self.controller
 
+    def render(self, packet: GameTickPacket):
+        self.renderer.begin_rendering()
+        # commented out due to performance concerns
+        # self.renderer.draw_polyline_3d([[car_location.x+triforce(-20,20), car_location.y+triforce(-20,20), triforce(shreck(200),200)] for i in range(40)], self.renderer.cyan())
+        self.renderer.draw_rect_2d(0, 0, 3840, 2160, True, self.renderer.create_color(64, 246, 74, 138))  # first bot that supports 4k resolution!
+        self.renderer.draw_string_2d(triforce(20, 50), triforce(10, 20), 5, 5, 'ALICE NAKIRI IS BEST GIRL', self.renderer.white())
+        self.renderer.draw_string_2d(triforce(20, 50), triforce(90, 100), 2, 2, '(zero two is a close second)', self.renderer.lime())
+        self.renderer.draw_string_2d(20, 100, 2, 2, "Max Speed: " + str(int(estimate_max_speed(self.car))), self.renderer.white())
+        impact = self.plan.impact
+        if self.destination is not None:
+            self.renderer.draw_line_3d([self.destination.x, self.destination.y, impact.z], [impact.x, impact.y, impact.z], self.renderer.blue())
+            car_location = self.car.physics.location
+            if self.avoid_own_goal: self.renderer.draw_line_3d([car_location.x, car_location.y, 0], [self.impact_projection.x, self.impact_projection.y, 0], self.renderer.yellow())
+        self.renderer.end_rendering()
 
-def dodge(self, angle_to_ball: float, target=None):
-    if self.car.has_wheel_contact and not self.dodging:
-        if target is None:
-            roll = 0
-            pitch = 1
-        else:
-            roll = math.sin(angle_to_ball)
-            pitch = math.cos(angle_to_ball)
-        self.dodge_pitch = -pitch
-        self.dodge_roll = roll
-        self.dodging = True
-        self.controller.jump = True
-        self.next_dodge_time = self.time + 0.1
-
-    elif self.time > self.next_dodge_time:
-        self.controller.jump = True
-        self.controller.pitch = clamp11(self.dodge_pitch)
-        self.controller.roll = clamp11(self.dodge_roll)
-        if self.car.has_wheel_contact or self.time > self.next_dodge_time + 1:
-            self.dodging = False
-
-
-def halfflip(self):
-    if not self.halfflipping and self.car.has_wheel_contact:
-        self.halfflipping = True
-        self.controller.jump = True
-        self.next_dodge_time = self.time
-    elif self.time > self.next_dodge_time + 1.0:
-        self.halfflipping = False
-    elif self.time > self.next_dodge_time + 0.6:
-        self.controller.pitch = -1
-        self.controller.roll = 1
-        if self.car.has_wheel_contact:
-            self.halfflipping = False
-    elif self.time > self.next_dodge_time + 0.3:
-        self.controller.jump = True
-        self.controller.pitch = 1
+        ball_location = packet.game_ball.physics.location
+        self.renderer.begin_rendering("Impact")
+        self.renderer.draw_line_3d([ball_location.x, ball_location.y, ball_location.z], [impact.x, impact.y, impact.z], self.renderer.red())
+        self.renderer.end_rendering()
 
 
 def get_car_facing_vector(car):
@@ -249,60 +312,6 @@ def bounce_time(s: float, u: float, a: float = 650):
         return 0
 
 
-def get_ball_bounces(path: BallPrediction) -> List[Slice]:
-    """
-    Calculates when the ball bounces.
-
-    :param path: The BallPrediction object given by the framework
-    :return: BallPrediction Slices when the ball bounces
-    """
-    bounces: List[Slice] = []
-
-    # Skip the first 10 frames because they cause issues with finding bounces
-    for i in range(10, path.num_slices):
-        prev_slice: Slice = path.slices[i - 1]
-        current_slice: Slice = path.slices[i]
-        acceleration: Vector3 = (Vector3(current_slice.physics.velocity) - Vector3(prev_slice.physics.velocity)) / \
-                                (current_slice.game_seconds - prev_slice.game_seconds)
-        # The ball's Z acceleration will not be around -650 if it is bouncing.
-        if not (-600 > acceleration.z > -680):
-            bounces.append(current_slice)
-
-    return bounces
-
-
-def estimate_max_speed(car, cap_at_sonic: bool = True):
-    velocity_vec = Vector2(car.physics.velocity.x, car.physics.velocity.y)
-    velocity = velocity_vec.length
-    boost = float(car.boost)
-
-    return min(2200.0 if cap_at_sonic else 2300.0, 1410.0 + boost / 33.3 * 991.667)
-
-
-def get_impact(path: BallPrediction, car, ball_position: Vector3, renderer = None) -> Tuple[Vector3, float]:
-    car_position = Vector3(car.physics.location.x, car.physics.location.y, car.physics.location.z)
-    prev_slice = ball_position
-
-    u = Vector3(car.physics.velocity.x, car.physics.velocity.y, car.physics.velocity.z).length
-    v = estimate_max_speed(car)
-    for i in range(0, path.num_slices):
-        current_slice: Vector3 = Vector3(path.slices[i].physics.location.x, path.slices[i].physics.location.y, path.slices[i].physics.location.z)
-
-        s = ((current_slice - car_position).length - 92.75)
-        t = (float(i) / 60)
-        a = (991.667 if car.boost > 0 else 0) + (0 if u > 1410 else 1000) #Bad estimation
-        t_a = (0 if a == 0 else (v - u) / a)
-        mx_s = ((t + (t - t_a)) / 2 * v + u * t) 
-
-        if mx_s > s:
-            if renderer is not None: renderer.begin_rendering("Impact")
-            renderer.draw_line_3d([ball_position.x, ball_position.y, ball_position.z], [current_slice.x, current_slice.y, current_slice.z], renderer.red())
-            if renderer is not None: renderer.end_rendering()
-            return current_slice, t
-
-    return ball_position, 0 #Couldn't find a point of impact
-
-
 def project_to_wall(point: Vector2, direction: Vector2) -> Vector2:
     wall = Vector2(sign(direction.x) * 4096, sign(direction.y) * 5120)
     dir_normal = direction.normalized
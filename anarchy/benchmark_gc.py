@@ -0,0 +1,78 @@
+'''
+Compares tick latency in the normal, pipelined and deferred_gc modes, by playing the simulator scenarios with a real tick budget.
+Each mode runs in a fresh process, since freezing and disabling the collector affects the whole interpreter.
+
+    python benchmark_gc.py --rounds 5
+'''
+
+import argparse
+import multiprocessing
+import time
+from typing import Dict, List, Tuple
+
+from anarchy import Anarchy
+from utilities.deadline import TickBudget, TICK_BUDGET
+from utilities.planner import Planner
+from utilities.simulator import Simulator, default_scenarios
+
+
+# Mode name: pipelined, deferred_gc
+MODES: Dict[str, Tuple[bool, bool]] = {"normal": (False, False), "pipelined": (True, False), "deferred_gc": (False, True)}
+
+
+def play(pipelined: bool, deferred: bool, rounds: int) -> Tuple[List[float], str]:
+    """Plays every scenario `rounds` times, and returns how long each tick took and the budget's report."""
+    budget = TickBudget()
+    latencies = []
+    for _ in range(rounds):
+        for scenario in default_scenarios():
+            agent = Anarchy("Anarchy", scenario.car.team, 0)
+            agent.gc_control.deferred = deferred
+            if pipelined:
+                agent.planner = Planner(agent.tuning, agent.logger)
+            get_output = agent.get_output
+
+            def timed(packet):
+                start = time.perf_counter()
+                controls = get_output(packet)
+                latencies.append(time.perf_counter() - start)
+                return controls
+
+            agent.get_output = timed
+            Simulator(agent, scenario, budget).run()
+    return latencies, budget.report()
+
+
+def play_into(results: multiprocessing.Queue, pipelined: bool, deferred: bool, rounds: int) -> None:
+    results.put(play(pipelined, deferred, rounds))
+
+
+def summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    at = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+    return {"p50": at(0.5), "p99": at(0.99), "p99.9": at(0.999), "max": ordered[-1] * 1000,
+            "over budget": sum(latency > TICK_BUDGET for latency in latencies)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3, help="How many times to play each scenario per mode")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    for mode, (pipelined, deferred) in MODES.items():
+        # A plain process rather than a pool, since pool workers are daemons and can't start the planner's process
+        results = context.Queue()
+        process = context.Process(target=play_into, args=(results, pipelined, deferred, args.rounds))
+        process.start()
+        latencies, report = results.get()
+        process.join()
+        stats = summary(latencies)
+        print(f"\n{mode}: {len(latencies)} ticks")
+        print("  " + ", ".join(f"{name} {value:.3f}ms" for name, value in stats.items() if name != "over budget")
+              + f", {stats['over budget']} over budget")
+        print("  " + report.replace("\n", "\n  "))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+'''
+Builds assets.bundle, the one file utilities/assets.py maps all of Anarchy's assets from, or unpacks it again.
+Assets are named by their path inside the directory. Meshes (.obj) get compiled to the binary .mesh format
+render_mesh loads straight out of the bundle, and turn back into .obj when unpacked.
+
+    python make_assets.py pack some_dir    # Replace assets.bundle with everything in some_dir
+    python make_assets.py unpack some_dir  # Write every asset in assets.bundle out to some_dir
+    python make_assets.py list             # Show what's in the bundle
+'''
+
+import argparse
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from utilities.assets import AssetBundle, BUNDLE_FILE, write_bundle
+from utilities.render_mesh import mesh_to_obj, pack_mesh
+
+
+def collect(directory: Path) -> Iterator[Tuple[str, bytes]]:
+    for path in sorted(p for p in directory.rglob("*") if p.is_file()):
+        name = path.relative_to(directory).as_posix()
+        if path.suffix == ".obj":
+            yield name[:-len(".obj")] + ".mesh", pack_mesh(path.read_text())
+        else:
+            yield name, path.read_bytes()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("pack", "unpack", "list"))
+    parser.add_argument("directory", type=Path, nargs="?")
+    parser.add_argument("--bundle", type=Path, default=BUNDLE_FILE)
+    args = parser.parse_args()
+    if args.command != "list" and args.directory is None:
+        parser.error(f"{args.command} needs a directory")
+
+    if args.command == "pack":
+        contents = list(collect(args.directory))
+        write_bundle(args.bundle, contents)
+        print(f"Packed {len(contents)} assets into {args.bundle} ({args.bundle.stat().st_size} bytes)")
+        return
+
+    bundle = AssetBundle(args.bundle)
+    for name in bundle.names():
+        if args.command == "list":
+            print(f"{bundle.size(name):>10}  {name}")
+            continue
+        path = args.directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".mesh":
+            path.with_suffix(".obj").write_text(mesh_to_obj(bundle[name]))
+        else:
+            path.write_bytes(bundle[name])
+
+
+if __name__ == "__main__":
+    main()
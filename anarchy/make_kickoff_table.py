@@ -0,0 +1,106 @@
+'''
+Generates utilities/kickoff_table.py, the frame by frame kickoff inputs for each spawn, from the routines below.
+The routines are written for the blue spawns on the left (negative x), Kickoff mirrors them for the others.
+
+    python make_kickoff_table.py --simulate  # Drive each routine in the headless simulator, check this first
+    python make_kickoff_table.py             # Regenerate the table
+'''
+
+import argparse
+import math
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from utilities.input_frames import FRAME_RATE, encode, expand, apply
+from utilities.kickoff import SPAWNS
+
+
+# Each routine is a list of (seconds, inputs) segments, played one after the other
+GO = dict(throttle=1, boost=True)
+# A front flip, the jump is let go for a few frames so the second press counts as a dodge
+FLIP = [
+    (0.05, dict(throttle=1, jump=True)),
+    (0.05, dict(throttle=1)),
+    (0.10, dict(throttle=1, jump=True, pitch=-1)),
+]
+# Hold the nose down through the last flip so it goes into the ball rather than over it
+FINISH = [(0.50, dict(throttle=1, pitch=-1))]
+# An early flip for speed, then boost until the flip into the ball. Flips land slower in game than
+# in the simulator, so the second one waits at least 0.8s after the first. The boost before it is long
+# enough that the final dodge starts 200-300 from the ball, so the car is still flipping when it gets there.
+ROUTINES: Dict[str, List[Tuple[float, dict]]] = {
+    "diagonal": [
+        (14 / FRAME_RATE, dict(GO, steer=1)),  # The spawn faces a little to the right of the ball
+        (0.40, GO), *FLIP,
+        (1.20, GO), *FLIP, *FINISH,
+    ],
+    "off_centre": [
+        (11 / FRAME_RATE, dict(GO, steer=-1)),  # And this one a little to the left
+        (0.50, GO), *FLIP,
+        (1.35, GO), *FLIP, *FINISH,
+    ],
+    "straight": [
+        (0.60, GO), *FLIP,
+        (1.75, GO), *FLIP, *FINISH,
+    ],
+}
+
+TABLE_FILE = Path(__file__).absolute().parent / "utilities" / "kickoff_table.py"
+
+
+def runs(routine: List[Tuple[float, dict]]) -> List[Tuple[int, int]]:
+    return [(round(seconds * FRAME_RATE), encode(**inputs)) for seconds, inputs in routine]
+
+
+def pack(routine_runs: List[Tuple[int, int]]) -> bytes:
+    values = array("H", [value for run in routine_runs for value in run])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_table() -> None:
+    lines = ["# Generated by make_kickoff_table.py, edit the routines there instead.",
+             "# Each routine is little endian (frame count, packed input) pairs of unsigned shorts, see utilities/input_frames.py.",
+             "", "ROUTINES = {"]
+    for name, routine in ROUTINES.items():
+        lines.append(f"    {name!r}: {pack(runs(routine))!r},")
+    lines += ["}", ""]
+    TABLE_FILE.write_text("\n".join(lines))
+    print(f"Wrote {TABLE_FILE}")
+
+
+def simulate() -> None:
+    from rlbot.agents.base_agent import SimpleControllerState
+    from utilities.simulator import SimCar
+
+    for (x, y), name, mirror in SPAWNS:
+        yaw = (math.pi / 4 if x < 0 else 3 * math.pi / 4) if name == "diagonal" else math.pi / 2
+        car = SimCar(x, y, yaw, 0)
+        controller = SimpleControllerState()
+        routine_runs = runs(ROUTINES[name])
+        # The frame the last dodge starts on, the last segment that jumps with the stick forward
+        starts = [sum(count for count, _ in routine_runs[:i]) for i in range(len(routine_runs))]
+        final_dodge = max(start for start, (seconds, inputs) in zip(starts, ROUTINES[name]) if inputs.get("jump") and inputs.get("pitch"))
+        closest, dodge_distance = (math.inf, 0), math.inf
+        for frame, code in enumerate(expand(routine_runs)):
+            apply(code, controller, mirror)
+            car.step(controller, frame / FRAME_RATE, 1 / FRAME_RATE)
+            distance = math.hypot(car.x, car.y)
+            closest = min(closest, (distance, frame / FRAME_RATE))
+            if frame == final_dodge:
+                dodge_distance = distance
+        print(f"{name:>10} from ({x}, {y}): final dodge {dodge_distance:.0f} from the ball after {final_dodge / FRAME_RATE:.2f}s, "
+              f"closest {closest[0]:.0f} after {closest[1]:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--simulate", action="store_true", help="Only simulate the routines, without writing the table")
+    args = parser.parse_args()
+    if args.simulate:
+        simulate()
+    else:
+        write_table()
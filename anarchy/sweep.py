@@ -0,0 +1,93 @@
+'''
+Tunes the constants in utilities/tuning.py by playing them through the headless simulator.
+Every combination gets played through the same scenarios, spread over all cores, and the best ones are printed.
+Combinations are ranked by how many ticks raised first, since no score makes up for a bot that froze, then by score.
+
+    python sweep.py --samples 2000
+'''
+
+import argparse
+import itertools
+import multiprocessing
+import random
+import time
+from dataclasses import asdict, fields
+from typing import Dict, List, Tuple
+
+from anarchy import Anarchy
+from utilities.simulator import Simulator, Result, default_scenarios
+from utilities.tuning import Tuning
+
+
+# Values to try for each constant, the defaults are always included
+PARAMETER_SPACE: Dict[str, List[float]] = {
+    "shadow_divisor": [2.0, 2.5, 2.9, 3.4, 4.0],
+    "offset_divisor": [2.5, 3.0, 3.4, 4.0, 5.0],
+    "own_goal_offset": [50, 100, 200],
+    "own_goal_offset_per_second": [100, 200, 300],
+    "bounce_window": [0.25, 0.5, 0.75, 1.0],
+    "aerial_min_time": [2.0, 2.5, 3.0],
+    "aerial_min_height": [300, 500, 700],
+    "aerial_max_speed": [500, 1000, 1500],
+}
+
+
+def errors(results: List[Result]) -> int:
+    return sum(result.errors for result in results)
+
+
+def evaluate(tuning: Tuning) -> Tuple[Tuning, float, List[Result]]:
+    results = []
+    for scenario in default_scenarios():
+        agent = Anarchy("Anarchy", scenario.car.team, 0)
+        agent.tuning = tuning
+        results.append(Simulator(agent, scenario).run())
+    return tuning, sum(result.score for result in results) / len(results), results
+
+
+def combinations(samples: int, seed: int) -> List[Tuning]:
+    names = [f.name for f in fields(Tuning)]
+    grid = [PARAMETER_SPACE.get(name, [getattr(Tuning(), name)]) for name in names]
+    total = 1
+    for values in grid:
+        total *= len(values)
+    if samples <= 0 or samples >= total:
+        chosen = itertools.product(*grid)
+    else:
+        rng = random.Random(seed)
+        chosen = {tuple(rng.choice(values) for values in grid) for _ in range(samples)}
+    tunings = [Tuning(**dict(zip(names, values))) for values in chosen]
+    if Tuning() not in tunings:
+        tunings.append(Tuning())  # Always compare against what Anarchy uses now
+    return tunings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1000, help="How many random combinations to try, 0 for all of them")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--top", type=int, default=10, help="How many of the best combinations to print")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tunings = combinations(args.samples, args.seed)
+    print(f"Trying {len(tunings)} combinations on {args.processes} processes")
+    start = time.perf_counter()
+    ranked = []
+    with multiprocessing.Pool(args.processes) as pool:
+        for i, (tuning, score, results) in enumerate(pool.imap_unordered(evaluate, tunings, chunksize=4), 1):
+            ranked.append((score, tuning, results))
+            if i % 100 == 0:
+                print(f"{i}/{len(tunings)} done after {time.perf_counter() - start:.0f}s")
+    ranked.sort(key=lambda entry: (errors(entry[2]), -entry[0]))
+
+    baseline_score, baseline_results = next((score, results) for score, tuning, results in ranked if tuning == Tuning())
+    print(f"\nCurrent constants score {baseline_score:.3f} with {errors(baseline_results)} errors")
+    for score, tuning, results in ranked[:args.top]:
+        goals_for = sum(result.goals_for for result in results)
+        goals_against = sum(result.goals_against for result in results)
+        print(f"{score:.3f}  goals {goals_for}-{goals_against}  errors {errors(results)}  {asdict(tuning)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+'''
+One file with every asset Anarchy ships (the audio and the mesh), so nothing gets unzipped or read whole at runtime.
+
+The bundle is memory mapped the first time an asset is asked for, and every asset is a memoryview into that mapping,
+so only the pages of the assets that actually get used are ever read. Build or unpack it with make_assets.py.
+
+Layout, all little endian:
+    header  magic b"ANAB", version u16, asset count u16
+    index   per asset: name length u16, utf-8 name, offset u64, size u64
+    data    every asset starts on an 8 byte boundary, so it can be cast to arrays in place
+'''
+
+import mmap
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+BUNDLE_FILE = Path(__file__).absolute().parent.parent / "assets.bundle"
+_MAGIC = b"ANAB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_NAME_LENGTH = struct.Struct("<H")
+_LOCATION = struct.Struct("<QQ")  # offset, size
+_ALIGN = 8
+
+
+class AssetBundle:
+    """Read only access to a bundle. Nothing is opened until the first lookup."""
+    def __init__(self, path: Path = BUNDLE_FILE) -> None:
+        self.path: Path = Path(path)
+        self.mapping: Optional[mmap.mmap] = None
+        self.view: Optional[memoryview] = None
+        self.locations: Dict[str, Tuple[int, int]] = dict()
+        self.assets: Dict[str, memoryview] = dict()
+
+    def open(self) -> None:
+        if self.view is not None:
+            return
+        with open(self.path, "rb") as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mapping)
+        magic, version, count = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{self.path} is not a version {_VERSION} asset bundle")
+        position = _HEADER.size
+        for _ in range(count):
+            length, = _NAME_LENGTH.unpack_from(view, position)
+            position += _NAME_LENGTH.size
+            name = bytes(view[position:position + length]).decode("utf-8")
+            position += length
+            self.locations[name] = _LOCATION.unpack_from(view, position)
+            position += _LOCATION.size
+        self.view = view
+
+    def names(self) -> List[str]:
+        self.open()
+        return list(self.locations)
+
+    def size(self, name: str) -> int:
+        """The size of an asset in bytes, without touching its data."""
+        self.open()
+        return self.locations[name][1]
+
+    def __contains__(self, name: str) -> bool:
+        self.open()
+        return name in self.locations
+
+    def __getitem__(self, name: str) -> memoryview:
+        asset = self.assets.get(name)
+        if asset is None:
+            self.open()
+            offset, size = self.locations[name]
+            asset = self.assets[name] = self.view[offset:offset + size]
+        return asset
+
+
+@lru_cache()
+def assets() -> AssetBundle:
+    """The bundle Anarchy ships with, shared by everything in the process."""
+    return AssetBundle()
+
+
+def write_bundle(path: Path, contents: Iterable[Tuple[str, bytes]]) -> None:
+    contents = list(contents)
+    index_size = _HEADER.size + sum(_NAME_LENGTH.size + len(name.encode("utf-8")) + _LOCATION.size for name, data in contents)
+    offset = index_size + -index_size % _ALIGN
+    index, padded = [_HEADER.pack(_MAGIC, _VERSION, len(contents))], []
+    for name, data in contents:
+        encoded = name.encode("utf-8")
+        index.append(_NAME_LENGTH.pack(len(encoded)) + encoded + _LOCATION.pack(offset, len(data)))
+        padded.append(bytes(data) + bytes(-len(data) % _ALIGN))
+        offset += len(padded[-1])
+    with open(path, "wb") as f:
+        header = b"".join(index)
+        f.write(header + bytes(-len(header) % _ALIGN))
+        for data in padded:
+            f.write(data)
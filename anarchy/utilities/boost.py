@@ -0,0 +1,108 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
+
+from utilities.vectors import Vector2
+
+
+_SMALL_RESPAWN: float = 4.0
+_FULL_RESPAWN: float = 10.0
+_CELL_SIZE: float = 1024.0  # Size of a spatial index cell, in unreal units
+_FIELD_X: float = 4096.0
+_FIELD_Y: float = 5120.0
+
+
+class BoostPad:
+    def __init__(self, index: int, x: float, y: float, is_full_boost: bool) -> None:
+        self.index: int = index
+        self.x: float = x
+        self.y: float = y
+        self.is_full_boost: bool = is_full_boost
+        self.active: bool = True
+        self.available_at: float = 0  # Game time at which the pad is (or will be) active again
+
+    @property
+    def location(self) -> Vector2:
+        return Vector2(self.x, self.y)
+
+    @property
+    def amount(self) -> int:
+        return 100 if self.is_full_boost else 12
+
+    def available_by(self, game_time: float) -> bool:
+        return self.active or self.available_at <= game_time
+
+
+class BoostPadTracker:
+    """Keeps track of every boost pad on the field and answers "which pad is on my way" queries.
+    The pad locations are read from the field info once, and the pads are bucketed into a coarse grid,
+    so a query only has to look at pads near the straight line between the car and its destination."""
+    def __init__(self) -> None:
+        self.pads: List[BoostPad] = list()
+        self.grid: Dict[Tuple[int, int], List[BoostPad]] = dict()
+        self.time: float = 0
+
+    def load(self, field_info: FieldInfoPacket) -> None:
+        self.pads = list()
+        self.grid = dict()
+        for i in range(field_info.num_boosts):
+            pad = field_info.boost_pads[i]
+            boost_pad = BoostPad(i, pad.location.x, pad.location.y, pad.is_full_boost)
+            self.pads.append(boost_pad)
+            self.grid.setdefault(_cell(boost_pad.x, boost_pad.y), list()).append(boost_pad)
+
+    def update(self, packet: GameTickPacket) -> None:
+        # Every pad is read every tick, and inactive ones are timed from the packet's timer rather than from when we
+        # noticed them go, so pads taken before the first packet or during a missed tick still come back on time
+        self.time = packet.game_info.seconds_elapsed
+        for pad in self.pads:
+            state = packet.game_boosts[pad.index]
+            pad.active = state.is_active
+            if pad.active:
+                pad.available_at = self.time
+            else:
+                # The timer counts the seconds since the pad was picked up
+                respawn = _FULL_RESPAWN if pad.is_full_boost else _SMALL_RESPAWN
+                pad.available_at = self.time + max(0.0, respawn - state.timer)
+
+    def cheapest_detour(self, start: Vector2, end: Vector2, max_detour: float, speed: float = 1410,
+                        full_only: bool = False) -> Optional[BoostPad]:
+        """
+        Finds the boost pad that adds the least distance to the trip from start to end.
+
+        :param start: Where the car is
+        :param end: Where the car wants to go
+        :param max_detour: The most extra distance the car is willing to drive to pick up the boost
+        :param speed: Rough speed of the car, used to check whether a pad will be back by the time we get there
+        :param full_only: Only look at the 100 boost pads
+        :return: The best pad, or None if no pad is within max_detour
+        """
+        direct = math.hypot(end.x - start.x, end.y - start.y)
+        # Every pad with a detour below max_detour lies inside an ellipse around the path,
+        # so only the cells under that ellipse's bounding box need to be searched.
+        radius = (direct + max_detour) / 2
+        mid_x = (start.x + end.x) / 2
+        mid_y = (start.y + end.y) / 2
+        min_cell = _cell(mid_x - radius, mid_y - radius)
+        max_cell = _cell(mid_x + radius, mid_y + radius)
+
+        best: Optional[BoostPad] = None
+        best_detour = max_detour
+        for cx in range(min_cell[0], max_cell[0] + 1):
+            for cy in range(min_cell[1], max_cell[1] + 1):
+                for pad in self.grid.get((cx, cy), ()):
+                    if full_only and not pad.is_full_boost:
+                        continue
+                    to_pad = math.hypot(pad.x - start.x, pad.y - start.y)
+                    detour = to_pad + math.hypot(end.x - pad.x, end.y - pad.y) - direct
+                    if detour < best_detour and pad.available_by(self.time + to_pad / max(speed, 1)):
+                        best = pad
+                        best_detour = detour
+        return best
+
+
+def _cell(x: float, y: float) -> Tuple[int, int]:
+    x = min(max(x, -_FIELD_X), _FIELD_X)
+    y = min(max(y, -_FIELD_Y), _FIELD_Y)
+    return int((x + _FIELD_X) // _CELL_SIZE), int((y + _FIELD_Y) // _CELL_SIZE)
@@ -0,0 +1,105 @@
+import numpy as np
+
+from rlbot.utils.structures.game_data_struct import GameTickPacket, MAX_PLAYERS
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction
+
+
+HORIZON: float = 2.0  # How far ahead to extrapolate, in seconds
+STEPS: int = 20  # How many points to extrapolate over the horizon
+_GRAVITY: float = -650
+_BALL_RADIUS: float = 92.75
+_DEMO_DISTANCE: float = 150
+
+
+class CarTracker:
+    """Keeps the state of every car in fixed-size arrays, one row per car index,
+    and extrapolates all of them at once so questions about every car cost one numpy pass."""
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.location: np.ndarray = np.zeros((MAX_PLAYERS, 3))
+        self.velocity: np.ndarray = np.zeros((MAX_PLAYERS, 3))
+        self.rotation: np.ndarray = np.zeros((MAX_PLAYERS, 3))  # pitch, yaw, roll
+        self.team: np.ndarray = np.zeros(MAX_PLAYERS, dtype=int)
+        self.boost: np.ndarray = np.zeros(MAX_PLAYERS)
+        self.on_ground: np.ndarray = np.zeros(MAX_PLAYERS, dtype=bool)
+        self.supersonic: np.ndarray = np.zeros(MAX_PLAYERS, dtype=bool)
+        self.demolished: np.ndarray = np.zeros(MAX_PLAYERS, dtype=bool)
+        self.times: np.ndarray = np.linspace(HORIZON / STEPS, HORIZON, STEPS)
+        self.future: np.ndarray = np.zeros((MAX_PLAYERS, STEPS, 3))  # Extrapolated locations of each car
+        self.ball_path: np.ndarray = np.zeros((STEPS, 3))  # Ball locations at self.times
+
+    def update(self, packet: GameTickPacket, ball_prediction: BallPrediction = None) -> None:
+        self.count = packet.num_cars
+        for i in range(self.count):
+            car = packet.game_cars[i]
+            physics = car.physics
+            self.location[i] = (physics.location.x, physics.location.y, physics.location.z)
+            self.velocity[i] = (physics.velocity.x, physics.velocity.y, physics.velocity.z)
+            self.rotation[i] = (physics.rotation.pitch, physics.rotation.yaw, physics.rotation.roll)
+            self.team[i] = car.team
+            self.boost[i] = car.boost
+            self.on_ground[i] = car.has_wheel_contact
+            self.supersonic[i] = car.is_super_sonic
+            self.demolished[i] = car.is_demolished
+        self.extrapolate()
+        if ball_prediction is not None:
+            self.sample_ball_path(ball_prediction)
+
+    def extrapolate(self) -> None:
+        n = self.count
+        t = self.times[None, :, None]
+        future = self.location[:n, None, :] + self.velocity[:n, None, :] * t
+        # Cars in the air fall, cars on the ground keep driving in a straight line
+        airborne = ~self.on_ground[:n]
+        future[airborne, :, 2] += 0.5 * _GRAVITY * self.times ** 2
+        np.clip(future[..., 0], -4096, 4096, out=future[..., 0])
+        np.clip(future[..., 1], -5120, 5120, out=future[..., 1])
+        np.clip(future[..., 2], 17, 2044, out=future[..., 2])
+        self.future[:n] = future
+
+    def sample_ball_path(self, ball_prediction: BallPrediction) -> None:
+        last = ball_prediction.num_slices - 1
+        if last < 0:
+            return
+        for step, t in enumerate(self.times):
+            location = ball_prediction.slices[min(int(t * 60), last)].physics.location
+            self.ball_path[step] = (location.x, location.y, location.z)
+
+    def arrival_times(self) -> np.ndarray:
+        """
+        Estimates when each car could reach the ball, using a constant acceleration up to max speed.
+
+        :return: Time in seconds for each car index, np.inf if it can't get there within the horizon
+        """
+        n = self.count
+        distance = np.linalg.norm(self.ball_path[None, :, :] - self.location[:n, None, :], axis=2) - _BALL_RADIUS
+        speed = np.linalg.norm(self.velocity[:n], axis=1)[:, None]
+        acceleration = np.where(self.boost[:n] > 0, 1991.667, 1000)[:, None]
+        t = self.times[None, :]
+        reach = np.minimum(speed * t + 0.5 * acceleration * t ** 2, 2300 * t)
+        reachable = reach >= distance
+        times = np.where(reachable.any(axis=1), self.times[reachable.argmax(axis=1)], np.inf)
+        times[self.demolished[:n]] = np.inf
+        return times
+
+    def opponent_first(self, index: int, margin: float = 0.2) -> bool:
+        """Whether an opponent of the given car gets to the ball at least margin seconds before it."""
+        times = self.arrival_times()
+        opponents = self.team[:self.count] != self.team[index]
+        if not opponents.any():
+            return False
+        return bool(times[opponents].min() + margin < times[index])
+
+    def demo_incoming(self, index: int, within: float = 0.5) -> bool:
+        """Whether a supersonic opponent's straight line path comes within demo range of the given car's in the next `within` seconds."""
+        n = self.count
+        threats = (self.team[:n] != self.team[index]) & self.supersonic[:n] & ~self.demolished[:n]
+        if not threats.any():
+            return False
+        # Closest approach of each threat, solved exactly so fast approaches can't slip between samples
+        offset = self.location[:n][threats] - self.location[index]
+        closing = self.velocity[:n][threats] - self.velocity[index]
+        speed_squared = np.einsum('ij,ij->i', closing, closing)
+        t = np.clip(-np.einsum('ij,ij->i', offset, closing) / np.maximum(speed_squared, 1e-9), 0, within)
+        gaps = np.linalg.norm(offset + closing * t[:, None], axis=1)
+        return bool((gaps < _DEMO_DISTANCE).any())
@@ -0,0 +1,82 @@
+import time
+from collections import Counter
+from enum import IntEnum
+from typing import Callable, Dict, Tuple
+
+
+TICK_BUDGET: float = 1 / 120  # Seconds each tick may spend before optional work gets cut
+
+
+class Degradation(IntEnum):
+    FULL = 0  # The stage ran to completion
+    PARTIAL = 1  # The stage stopped early with its best result so far
+    REUSED = 2  # The stage reused the previous tick's result
+    SKIPPED = 3  # The stage didn't run at all
+
+
+class TickBudget:
+    """Shares a time budget between the stages of a tick.
+    Every stage that runs gets marked with how degraded it was this tick, and the marks are counted in `end`."""
+    def __init__(self, budget: float = TICK_BUDGET) -> None:
+        self.budget: float = budget
+        self.deadline: float = 0
+        self.current: Dict[str, Degradation] = dict()
+        self.counters: Dict[str, Counter] = dict()
+        self.ticks: int = 0
+        self.late_ticks: int = 0
+        self.pauses: Dict[str, Tuple[int, float, float]] = dict()  # Count, total and longest seconds
+
+    def start(self) -> None:
+        self.deadline = time.perf_counter() + self.budget
+        self.current.clear()
+
+    @property
+    def remaining(self) -> float:
+        return self.deadline - time.perf_counter()
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.deadline
+
+    def mark(self, stage: str, level: Degradation = Degradation.FULL) -> None:
+        # A stage keeps the worst level it was marked with this tick
+        self.current[stage] = max(self.current.get(stage, Degradation.FULL), level)
+
+    def level(self, stage: str) -> Degradation:
+        """How degraded a stage has been so far this tick."""
+        return self.current.get(stage, Degradation.FULL)
+
+    def out_of_time(self, stage: str) -> bool:
+        """For stages that can stop early: returns True, and marks the stage as partial, once the budget is used up."""
+        if not self.expired():
+            return False
+        self.mark(stage, Degradation.PARTIAL)
+        return True
+
+    def run(self, stage: str, function: Callable, *args, cost: float = 0, **kwargs):
+        """Runs an optional stage if there is at least `cost` seconds left, otherwise skips it and returns None."""
+        if self.remaining < cost:
+            self.mark(stage, Degradation.SKIPPED)
+            return None
+        self.mark(stage)
+        return function(*args, **kwargs)
+
+    def pause(self, name: str, seconds: float) -> None:
+        """Records a pause that isn't part of any stage, like a garbage collection."""
+        count, total, longest = self.pauses.get(name, (0, 0.0, 0.0))
+        self.pauses[name] = (count + 1, total + seconds, max(longest, seconds))
+
+    def end(self) -> None:
+        self.ticks += 1
+        if self.expired():
+            self.late_ticks += 1
+        for stage, level in self.current.items():
+            self.counters.setdefault(stage, Counter())[level] += 1
+
+    def report(self) -> str:
+        lines = [f"{self.late_ticks}/{self.ticks} ticks over budget"]
+        for stage, counter in self.counters.items():
+            levels = ", ".join(f"{level.name.lower()} {counter[level]}" for level in Degradation if counter[level])
+            lines.append(f"{stage}: {levels}")
+        for name, (count, total, longest) in sorted(self.pauses.items()):
+            lines.append(f"{name}: {count} pauses, {total * 1000:.1f}ms total, {longest * 1000:.2f}ms longest")
+        return "\n".join(lines)
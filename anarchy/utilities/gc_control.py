@@ -0,0 +1,86 @@
+'''
+Keeps garbage collection pauses off the tick path.
+
+Anarchy allocates a lot of objects that live for the whole game (the mesh alone is thousands of polygons and vectors),
+and a few hundred more every tick that are gone by the next one. Automatic collections walk all of them at whatever
+point in a tick they happen to trigger. In deferred mode the startup objects get frozen, so no collection walks them
+again, and collections only run at the end of ticks that have time to spare.
+'''
+
+import gc
+import time
+from typing import Optional
+
+from utilities.deadline import TickBudget, Degradation
+
+
+# Roughly how long collecting each generation takes once the startup objects are frozen
+COLLECT_COST = (0.0002, 0.0005, 0.002)
+# Young objects get collected anyway once this many times the usual threshold piled up, so memory can't run away
+FORCE_FACTOR = 10
+# The collector is shared by the whole process. On a hot reload the new agent starts before the old one retires,
+# so only the agent that froze and disabled it last gets to turn it back on.
+_collector_owner: Optional["GcControl"] = None
+
+
+class GcControl:
+    """Times every collection into the tick budget's report, and in deferred mode decides when collections happen."""
+    def __init__(self, deferred: bool = False) -> None:
+        self.deferred: bool = deferred
+        self.budget: Optional[TickBudget] = None
+        self.started_at: float = 0
+        self.reason: str = "automatic"  # Why the collection that's running started, for the report
+
+    def start(self, budget: TickBudget) -> None:
+        """Call once everything that lives for the whole game is loaded."""
+        global _collector_owner
+        self.budget = budget
+        gc.callbacks.append(self.on_collection)
+        if self.deferred:
+            self.reason = "startup"
+            gc.collect()
+            self.reason = "automatic"
+            gc.freeze()
+            gc.disable()
+            _collector_owner = self
+
+    def stop(self) -> None:
+        if self.on_collection in gc.callbacks:
+            gc.callbacks.remove(self.on_collection)
+        global _collector_owner
+        if _collector_owner is self:
+            gc.unfreeze()
+            gc.enable()
+            _collector_owner = None
+
+    def on_collection(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self.started_at = time.perf_counter()
+        elif self.budget is not None:
+            self.budget.pause(f"gc {self.reason} gen {info['generation']}", time.perf_counter() - self.started_at)
+
+    def collect(self) -> None:
+        """
+        At the end of a tick: collects the oldest generation whose count has reached its threshold, if there's time left for it.
+        Unlike the automatic collector, a full collection runs as soon as generation 2's count reaches its threshold,
+        without CPython's extra check that enough long-lived objects are pending, since that isn't visible from Python.
+        """
+        if not self.deferred:
+            return
+        counts, thresholds = gc.get_count(), gc.get_threshold()
+        if counts[0] < thresholds[0]:
+            return
+        generation = max(i for i in range(3) if counts[i] >= thresholds[i])
+        if self.budget.remaining < COLLECT_COST[generation]:
+            if counts[0] < FORCE_FACTOR * thresholds[0]:
+                self.budget.mark("gc", Degradation.SKIPPED)
+                return
+            generation = 0
+            self.budget.mark("gc", Degradation.PARTIAL)
+        else:
+            self.budget.mark("gc")
+        self.reason = "deferred"
+        try:
+            gc.collect(generation)
+        finally:
+            self.reason = "automatic"
@@ -0,0 +1,65 @@
+'''
+Packs one frame of controller input into a 16 bit int, so scripted inputs can be stored as compact arrays.
+Analog inputs are stored as -1, 0 or 1 only, which is all a scripted routine needs.
+'''
+
+import sys
+from array import array
+from typing import Iterable, Tuple
+
+from rlbot.agents.base_agent import SimpleControllerState
+
+
+FRAME_RATE: int = 120  # Physics ticks per second, scripted frames line up with them
+
+_STEER, _THROTTLE, _PITCH, _YAW, _ROLL = 0, 2, 4, 6, 8  # Bit offsets of the two bit analog inputs
+_JUMP, _BOOST, _HANDBRAKE = 1 << 10, 1 << 11, 1 << 12
+AIM = 1 << 13  # Pitch and roll come from the maneuver's aim instead of the frame, for dodges in any direction
+_DECODE = (0, 1, -1, 0)  # Two bit value to analog input
+
+
+def _pack(value: float, offset: int) -> int:
+    return (1 if value > 0 else 2 if value < 0 else 0) << offset
+
+
+def frame_at(seconds: float) -> int:
+    """The frame to play `seconds` into a script. Rounded, since game times are floats and can land just short of a frame."""
+    return round(seconds * FRAME_RATE)
+
+
+def encode(steer: float = 0, throttle: float = 0, pitch: float = 0, yaw: float = 0, roll: float = 0,
+           jump: bool = False, boost: bool = False, handbrake: bool = False, aim: bool = False) -> int:
+    return (_pack(steer, _STEER) | _pack(throttle, _THROTTLE) | _pack(pitch, _PITCH) | _pack(yaw, _YAW) | _pack(roll, _ROLL)
+            | (_JUMP if jump else 0) | (_BOOST if boost else 0) | (_HANDBRAKE if handbrake else 0) | (AIM if aim else 0))
+
+
+def apply(code: int, controller: SimpleControllerState, mirror: bool = False, air_only: bool = False) -> None:
+    """Sets the inputs of the controller from a packed frame. Mirroring flips left and right.
+    With air_only, steer, throttle, boost and handbrake are left to whoever is driving."""
+    side = -1 if mirror else 1
+    controller.pitch = _DECODE[(code >> _PITCH) & 3]
+    controller.yaw = _DECODE[(code >> _YAW) & 3] * side
+    controller.roll = _DECODE[(code >> _ROLL) & 3] * side
+    controller.jump = bool(code & _JUMP)
+    if air_only:
+        return
+    controller.steer = _DECODE[(code >> _STEER) & 3] * side
+    controller.throttle = _DECODE[(code >> _THROTTLE) & 3]
+    controller.boost = bool(code & _BOOST)
+    controller.handbrake = bool(code & _HANDBRAKE)
+
+
+def expand(runs: Iterable[Tuple[int, int]]) -> array:
+    """Turns (frame count, code) runs into one code per frame."""
+    frames = array("H")
+    for count, code in runs:
+        frames.extend([code] * count)
+    return frames
+
+
+def unpack_runs(packed: bytes) -> array:
+    """Expands runs stored as little endian (frame count, code) pairs of unsigned shorts."""
+    values = array("H", packed)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return expand(zip(values[0::2], values[1::2]))
@@ -0,0 +1,70 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from rlbot.agents.base_agent import SimpleControllerState
+from rlbot.utils.structures.game_data_struct import PlayerInfo
+
+from utilities.input_frames import apply, frame_at, unpack_runs
+
+
+# Blue kickoff spawns, the routine to use from each, and whether the routine has to be mirrored
+SPAWNS: List[Tuple[Tuple[float, float], str, bool]] = [
+    ((-2048, -2560), "diagonal", False),
+    ((2048, -2560), "diagonal", True),
+    ((-256, -3840), "off_centre", False),
+    ((256, -3840), "off_centre", True),
+    ((0, -4608), "straight", False),
+]
+_SPAWN_TOLERANCE: float = 250
+
+
+def _load_scripts() -> Dict[str, array]:
+    from utilities.kickoff_table import ROUTINES
+    return {name: unpack_runs(packed) for name, packed in ROUTINES.items()}
+
+
+class Kickoff:
+    """Replays a precomputed input script for the spawn Anarchy kicks off from.
+    The scripts are expanded to one packed input per physics frame up front, so each tick is a single lookup."""
+    def __init__(self) -> None:
+        self.scripts: Dict[str, array] = _load_scripts()
+        self.script: Optional[array] = None
+        self.mirror: bool = False
+        self.start_time: float = 0
+        self.started: bool = False  # Whether this kickoff already picked its script
+
+    def select(self, car: PlayerInfo, game_time: float) -> None:
+        # Orange spawns are the blue ones turned around, so flip them onto the blue side first
+        team_sign = 1 if car.team == 0 else -1
+        x, y = car.physics.location.x * team_sign, car.physics.location.y * team_sign
+        self.script = None
+        for (spawn_x, spawn_y), name, mirror in SPAWNS:
+            if abs(x - spawn_x) < _SPAWN_TOLERANCE and abs(y - spawn_y) < _SPAWN_TOLERANCE:
+                self.script = self.scripts.get(name)
+                self.mirror = mirror
+                self.start_time = game_time
+                break
+
+    def step(self, kickoff: bool, round_active: bool, car: PlayerInfo, game_time: float, controller: SimpleControllerState) -> bool:
+        """
+        Plays the next frame of the kickoff script.
+
+        :return: True if the script set the controls this tick, False if Anarchy has to drive itself
+        """
+        if not kickoff:
+            self.script = None
+            self.started = False
+            return False
+        if not round_active:
+            return False  # Still counting down
+        if not self.started:
+            self.started = True
+            self.select(car, game_time)
+        if self.script is None:
+            return False
+        frame = frame_at(game_time - self.start_time)
+        if frame >= len(self.script):
+            self.script = None
+            return False
+        apply(self.script[frame], controller, self.mirror)
+        return True
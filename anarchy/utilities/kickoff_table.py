@@ -0,0 +1,8 @@
+# Generated by make_kickoff_table.py, edit the routines there instead.
+# Each routine is little endian (frame count, packed input) pairs of unsigned shorts, see utilities/input_frames.py.
+
+ROUTINES = {
+    'diagonal': b'\x0e\x00\x05\x080\x00\x04\x08\x06\x00\x04\x04\x06\x00\x04\x00\x0c\x00$\x04\x90\x00\x04\x08\x06\x00\x04\x04\x06\x00\x04\x00\x0c\x00$\x04<\x00$\x00',
+    'off_centre': b'\x0b\x00\x06\x08<\x00\x04\x08\x06\x00\x04\x04\x06\x00\x04\x00\x0c\x00$\x04\xa2\x00\x04\x08\x06\x00\x04\x04\x06\x00\x04\x00\x0c\x00$\x04<\x00$\x00',
+    'straight': b'H\x00\x04\x08\x06\x00\x04\x04\x06\x00\x04\x00\x0c\x00$\x04\xd2\x00\x04\x08\x06\x00\x04\x04\x06\x00\x04\x00\x0c\x00$\x04<\x00$\x00',
+}
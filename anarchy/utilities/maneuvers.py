@@ -0,0 +1,205 @@
+'''
+Scripted maneuvers (dodges, half-flips, wavedashes, speedflips) played back frame by frame.
+
+Each maneuver is compiled once into a timeline with one packed input per physics frame (see utilities/input_frames.py).
+The frame to play is worked out from the game time, so a late tick skips ahead instead of stretching the maneuver.
+
+Replay the maneuvers Anarchy did in a telemetry dump, and check they come out the same (from the anarchy folder):
+    python -m utilities.maneuvers telemetry/conceded_123.tlm
+'''
+
+import math
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from rlbot.agents.base_agent import SimpleControllerState
+
+from utilities.input_frames import FRAME_RATE, AIM, encode, expand, apply, frame_at
+
+
+class Timeline:
+    """
+    A compiled maneuver.
+
+    :param name: What it's registered as
+    :param frames: One packed input per physics frame
+    :param priority: A maneuver can only be interrupted by one with a higher priority, and only while the car is still on its wheels
+    :param land_after: The frame after which landing ends the maneuver early
+    :param air_only: Leave steer, throttle, boost and handbrake to the driving code
+    """
+    def __init__(self, name: str, frames: array, priority: int, land_after: int, air_only: bool) -> None:
+        self.name: str = name
+        self.frames: array = frames
+        self.priority: int = priority
+        self.land_after: int = land_after
+        self.air_only: bool = air_only
+        self.id: int = -1  # Index in the registry, set by register
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+
+MANEUVERS: Dict[str, Timeline] = {}
+
+
+def register(name: str, segments: List[Tuple[float, dict]], priority: int = 1, land_after: float = None, air_only: bool = True) -> Timeline:
+    """Compiles (seconds, inputs) segments into a timeline and adds it to the registry.
+    `land_after` is in seconds, by default the maneuver always plays to the end."""
+    frames = expand((round(seconds * FRAME_RATE), encode(**inputs)) for seconds, inputs in segments)
+    timeline = Timeline(name, frames, priority, len(frames) if land_after is None else round(land_after * FRAME_RATE), air_only)
+    timeline.id = MANEUVERS[name].id if name in MANEUVERS else len(MANEUVERS)
+    MANEUVERS[name] = timeline
+    return timeline
+
+
+def by_id(maneuver_id: int) -> Optional[Timeline]:
+    for timeline in MANEUVERS.values():
+        if timeline.id == maneuver_id:
+            return timeline
+    return None
+
+
+# Button presses last a few frames, so they don't get skipped when Anarchy runs at less than 120 ticks a second
+GO = dict(throttle=1, boost=True)
+register("dodge", [
+    (0.05, dict(jump=True)),
+    (0.05, dict()),
+    (1.00, dict(jump=True, aim=True)),  # Keep holding until landing
+], land_after=0.1)
+register("halfflip", [
+    (0.05, dict(jump=True)),
+    (0.25, dict()),
+    (0.30, dict(jump=True, pitch=1)),  # Backflip
+    (0.40, dict(pitch=-1, roll=1)),  # Cancel it and roll back upright
+], land_after=0.6)
+register("hop", [
+    (0.20, dict(jump=True)),
+], priority=2)  # Over incoming demos, even when something else was about to start
+register("wavedash", [
+    (0.03, dict(jump=True)),
+    (0.15, dict(pitch=1)),  # Tilt back so the back wheels land first
+    (0.65, dict()),
+    (0.05, dict(jump=True, aim=True)),  # Dodge right before the wheels touch
+], land_after=0.1)
+register("speedflip", [
+    (0.05, dict(GO, jump=True)),
+    (0.05, dict(GO)),
+    (0.05, dict(GO, jump=True, pitch=-1, yaw=-1)),  # Diagonal dodge
+    (0.45, dict(GO, pitch=1, yaw=-1)),  # Cancel the flip and keep the spin
+    (0.40, dict(GO, roll=1)),  # Level out for the landing
+], land_after=0.15, air_only=False)
+
+
+def aim_at(angle: float) -> Tuple[float, float]:
+    """The pitch and roll that dodge towards an angle relative to the car's nose."""
+    return -math.cos(angle), math.sin(angle)
+
+
+class ManeuverSequencer:
+    """Plays one maneuver at a time. Each tick is a single array lookup."""
+    def __init__(self) -> None:
+        self.timeline: Optional[Timeline] = None
+        self.start_time: float = 0
+        self.aim: Tuple[float, float] = (0, 0)
+        self.mirror: bool = False
+        self.frame: int = -1
+
+    @property
+    def active(self) -> bool:
+        return self.timeline is not None
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.timeline.name if self.timeline is not None else None
+
+    def start(self, name: str, game_time: float, wheel_contact: bool, aim: Tuple[float, float] = (0, 0), mirror: bool = False) -> bool:
+        """
+        Starts a maneuver, unless it can't interrupt the one that's playing.
+        Maneuvers only start from the ground, and asking for the one that's already playing does nothing.
+
+        :return: True if the maneuver started
+        """
+        timeline = MANEUVERS[name]
+        if not wheel_contact:
+            return False
+        if self.timeline is not None and (self.timeline is timeline or self.timeline.priority >= timeline.priority):
+            return False
+        self.timeline = timeline
+        self.start_time = game_time
+        self.aim = aim
+        self.mirror = mirror
+        self.frame = 0
+        return True
+
+    def cancel(self) -> None:
+        self.timeline = None
+        self.frame = -1
+
+    def step(self, game_time: float, wheel_contact: bool, controller: SimpleControllerState) -> bool:
+        """
+        Plays the frame of the current maneuver that lines up with the game time.
+
+        :return: True if the maneuver set the controls this tick
+        """
+        timeline = self.timeline
+        if timeline is None:
+            return False
+        frame = frame_at(game_time - self.start_time)
+        if frame >= len(timeline) or (frame > timeline.land_after and wheel_contact):
+            self.cancel()
+            return False
+        self.frame = frame
+        code = timeline.frames[frame]
+        apply(code, controller, self.mirror, timeline.air_only)
+        if code & AIM:
+            controller.pitch, controller.roll = self.aim
+        return True
+
+
+def replay(name: str, times, wheel_contact, aim: Tuple[float, float] = (0, 0), mirror: bool = False) -> List[Optional[SimpleControllerState]]:
+    """
+    Plays a maneuver against recorded game times and wheel contact, without a game running.
+
+    :return: The controls for each tick, None once the maneuver is over
+    """
+    sequencer = ManeuverSequencer()
+    sequencer.start(name, times[0], True, aim, mirror)
+    controls = []
+    for game_time, on_wheels in zip(times, wheel_contact):
+        controller = SimpleControllerState()
+        controls.append(controller if sequencer.step(game_time, bool(on_wheels), controller) else None)
+    return controls
+
+
+def _check_dump(path: str) -> int:
+    """Replays every maneuver in a telemetry dump and counts the ticks that came out different."""
+    from utilities.telemetry import read_dump
+
+    columns = read_dump(path)
+    ids, frames = columns["maneuver"], columns["maneuver_frame"]
+    mismatches = 0
+    for start in range(len(ids)):
+        if ids[start] < 0 or frames[start] != 0:
+            continue
+        timeline = by_id(int(ids[start]))
+        end = start
+        while end < len(ids) and ids[end] == ids[start] and (end == start or frames[end] != 0):
+            end += 1
+        aimed = [i for i in range(start, end) if timeline.frames[int(frames[i])] & AIM]
+        aim = (columns["pitch"][aimed[0]], columns["roll"][aimed[0]]) if aimed else (0, 0)
+        controls = replay(timeline.name, columns["time"][start:end], columns["wheel_contact"][start:end], aim)
+        for i, controller in enumerate(controls, start):
+            inputs = ("pitch", "yaw", "roll", "jump") if timeline.air_only else ("pitch", "yaw", "roll", "jump", "steer", "throttle", "boost", "handbrake")
+            wrong = [name for name in inputs if controller is None or abs(float(getattr(controller, name)) - columns[name][i]) > 1e-3]
+            if wrong:
+                mismatches += 1
+                print(f"  {timeline.name} at {columns['time'][i]:.3f}s: {', '.join(wrong)} differ")
+        print(f"{timeline.name} at {columns['time'][start]:.2f}s, {end - start} ticks")
+    return mismatches
+
+
+if __name__ == "__main__":
+    total = sum(_check_dump(dump_path) for dump_path in sys.argv[1:])
+    print(f"{total} ticks differ")
+    sys.exit(1 if total else 0)
@@ -0,0 +1,248 @@
+import ctypes
+import logging
+import math
+import multiprocessing
+from typing import List, Optional, Tuple
+
+from rlbot.utils.structures.game_data_struct import PlayerInfo
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction, Slice
+
+from utilities.vectors import Vector2, Vector3
+from utilities.deadline import TickBudget, Degradation
+from utilities.tuning import Tuning
+from utilities.steering import arrival_time
+
+
+MAX_PLAN_AGE: float = 0.05  # Pipelined plans older than this (6 ticks) get replaced by one made on the tick thread
+
+class Plan:
+    """Where and when to hit the ball, worked out from the packet at `game_time`.
+    Times are stored as game seconds rather than durations, so a plan stays correct as it ages."""
+    def __init__(self, game_time: float, impact: Vector3, impact_at: float, bounce_location: Optional[Vector2],
+                 bounce_at: float, aerial: bool, impact_found_at: float = None) -> None:
+        self.game_time: float = game_time
+        # Copies, since plans are shared between ticks and threads, and the tick thread edits vectors in place
+        self.impact: Vector3 = Vector3(impact.x, impact.y, impact.z)
+        self.impact_at: float = impact_at
+        # When the impact was found, which is earlier than game_time if it was carried over from an older plan
+        self.impact_found_at: float = game_time if impact_found_at is None else impact_found_at
+        self.bounce_location: Optional[Vector2] = Vector2(bounce_location.x, bounce_location.y) if bounce_location is not None else None
+        self.bounce_at: float = bounce_at
+        self.aerial: bool = aerial  # Whether the impact is worth going for with an aerial
+
+
+def make_plan(game_time: float, car: PlayerInfo, ball_location: Vector3, ball_prediction: BallPrediction,
+              budget: TickBudget = None, previous: Plan = None, tuning: Tuning = None) -> Plan:
+    """
+    Finds the impact point, the bounce to wait for, and whether to aerial.
+
+    :param budget: If given, the prediction scans stop early once the tick is out of time
+    :param previous: The plan to fall back to if the impact scan runs out of time. Needed if budget is given.
+    :param tuning: The constants to plan with, defaults to Tuning()
+    """
+    if tuning is None:
+        tuning = Tuning()
+    if budget is not None:
+        budget.mark("impact")
+    found = get_impact(ball_prediction, car, ball_location, budget)
+    if found is not None:
+        impact, impact_time = found
+        impact_at = game_time + impact_time
+        impact_found_at = game_time
+    else:
+        # Out of time, so keep going for last tick's impact
+        budget.mark("impact", Degradation.REUSED)
+        impact, impact_at, impact_found_at = previous.impact, previous.impact_at, previous.impact_found_at
+        impact_time = max(0.0, impact_at - game_time)
+
+    # Handle bouncing
+    if budget is not None:
+        budget.mark("bounces")
+    bounce_location = None
+    bounce_at = game_time
+    for b in get_ball_bounces(ball_prediction, budget):
+        if b.game_seconds - game_time < impact_time - tuning.bounce_window:
+            continue
+        bounce_location = Vector2(b.physics.location)
+        bounce_at = b.game_seconds
+        break
+    if bounce_location is None and budget is not None and budget.level("bounces") == Degradation.PARTIAL and previous is not None:
+        # The scan stopped before it got to the bounce, so keep waiting for last tick's
+        budget.mark("bounces", Degradation.REUSED)
+        bounce_location, bounce_at = previous.bounce_location, previous.bounce_at
+
+    team_sign = (1 if car.team == 0 else -1)
+    car_speed = Vector3(car.physics.velocity.x, car.physics.velocity.y, car.physics.velocity.z).length
+    aerial = (bounce_at - game_time > tuning.aerial_min_time and impact.z > tuning.aerial_min_height and car_speed < tuning.aerial_max_speed
+              and team_sign * car.physics.location.y < team_sign * ball_location.y)
+
+    return Plan(game_time, impact, impact_at, bounce_location, bounce_at, aerial, impact_found_at)
+
+
+class _PlanData(ctypes.Structure):
+    """A Plan flattened into plain numbers, so it fits in shared memory."""
+    _fields_ = [("game_time", ctypes.c_double), ("impact", ctypes.c_double * 3), ("impact_at", ctypes.c_double),
+                ("impact_found_at", ctypes.c_double), ("has_bounce", ctypes.c_bool), ("bounce_location", ctypes.c_double * 2),
+                ("bounce_at", ctypes.c_double), ("aerial", ctypes.c_bool)]
+
+
+class _PlanInputs(ctypes.Structure):
+    _fields_ = [("game_time", ctypes.c_double), ("car", PlayerInfo), ("ball_location", ctypes.c_double * 3),
+                ("ball_prediction", BallPrediction)]
+
+
+class Mailbox:
+    """Hands the newest value of a ctypes structure from one writer to readers in other processes, without locks.
+    The writer fills the slot it didn't publish last and then publishes it. A read that races a write of the same slot
+    sees the slot's sequence number change, and reports nothing instead of a torn value."""
+    def __init__(self, value_type: type) -> None:
+        slot_type = type("Slot", (ctypes.Structure,), {"_fields_": [("sequence", ctypes.c_uint64), ("value", value_type)]})
+        self.slots = multiprocessing.RawArray(slot_type, 2)
+        self.latest = multiprocessing.RawValue(ctypes.c_uint64, 0)  # Sequence number of the newest value, 0 before the first
+
+    def write(self, value: ctypes.Structure) -> None:
+        sequence = self.latest.value + 1
+        slot = self.slots[sequence % 2]
+        slot.sequence = 0
+        slot.value = value
+        slot.sequence = sequence
+        self.latest.value = sequence
+
+    def read(self, after: int = 0) -> Optional[Tuple[int, ctypes.Structure]]:
+        """Returns the sequence number and a copy of the newest value, or None if there is nothing newer than `after`."""
+        sequence = self.latest.value
+        if sequence <= after:
+            return None
+        slot = self.slots[sequence % 2]
+        value = type(slot.value).from_buffer_copy(slot.value)
+        if slot.sequence != sequence:
+            return None
+        return sequence, value
+
+
+def _plan_forever(inputs: Mailbox, plans: Mailbox, new_inputs: multiprocessing.Event, stopping: multiprocessing.Event,
+                  tuning: Tuning, logger_name: str) -> None:
+    logger = logging.getLogger(logger_name)
+    planned = 0
+    while not stopping.is_set():
+        new_inputs.wait()
+        new_inputs.clear()
+        read = inputs.read(planned)
+        if read is None:
+            continue
+        planned, data = read
+        ball_location = Vector3(*data.ball_location)
+        try:
+            plan = make_plan(data.game_time, data.car, ball_location, data.ball_prediction, tuning=tuning)
+        except Exception:
+            # Keep the process alive, the tick thread plans for itself until a plan comes through again
+            logger.exception("Planning failed")
+            continue
+        bounce = plan.bounce_location
+        plans.write(_PlanData(plan.game_time, (plan.impact.x, plan.impact.y, plan.impact.z), plan.impact_at, plan.impact_found_at,
+                              bounce is not None, (bounce.x, bounce.y) if bounce is not None else (0, 0), plan.bounce_at, plan.aerial))
+
+
+class Planner:
+    """Makes plans in a separate process, always from the newest inputs.
+    Planning is pure Python, so a thread would hold the GIL while the tick thread waits; a process plans next to it instead.
+    The tick thread hands inputs over with `submit` and reads the newest result from `plan`, both through shared memory."""
+    def __init__(self, tuning: Tuning = None, logger: logging.Logger = None) -> None:
+        logger = logger if logger is not None else logging.getLogger(__name__)
+        self.inputs: Mailbox = Mailbox(_PlanInputs)
+        self.plans: Mailbox = Mailbox(_PlanData)
+        self.new_inputs: multiprocessing.Event = multiprocessing.Event()
+        self.stopping: multiprocessing.Event = multiprocessing.Event()
+        self.process: multiprocessing.Process = multiprocessing.Process(
+            target=_plan_forever, args=(self.inputs, self.plans, self.new_inputs, self.stopping, tuning, logger.name),
+            name="Anarchy planner", daemon=True)
+        self.latest: Tuple[int, Optional[Plan]] = (0, None)  # The newest plan read so far, with its sequence number
+        self.staged: _PlanInputs = _PlanInputs()
+
+    def start(self) -> None:
+        self.process.start()
+
+    def submit(self, game_time: float, car: PlayerInfo, ball_location: Vector3, ball_prediction: BallPrediction) -> None:
+        staged = self.staged
+        staged.game_time = game_time
+        staged.car = car
+        staged.ball_location[:] = (ball_location.x, ball_location.y, ball_location.z)
+        staged.ball_prediction = ball_prediction
+        self.inputs.write(staged)
+        self.new_inputs.set()
+
+    @property
+    def plan(self) -> Optional[Plan]:
+        read = self.plans.read(self.latest[0])
+        if read is not None:
+            sequence, data = read
+            bounce_location = Vector2(*data.bounce_location) if data.has_bounce else None
+            self.latest = (sequence, Plan(data.game_time, Vector3(*data.impact), data.impact_at, bounce_location,
+                                          data.bounce_at, data.aerial, data.impact_found_at))
+        return self.latest[1]
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self.new_inputs.set()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def get_ball_bounces(path: BallPrediction, budget: TickBudget = None) -> List[Slice]:
+    """
+    Calculates when the ball bounces.
+
+    :param path: The BallPrediction object given by the framework
+    :param budget: If given, stop early with the bounces found so far once the tick is out of time
+    :return: BallPrediction Slices when the ball bounces
+    """
+    bounces: List[Slice] = []
+
+    # Skip the first 10 frames because they cause issues with finding bounces
+    for i in range(10, path.num_slices):
+        if budget is not None and i % 16 == 0 and budget.out_of_time("bounces"):
+            break
+        prev_slice: Slice = path.slices[i - 1]
+        current_slice: Slice = path.slices[i]
+        acceleration: Vector3 = (Vector3(current_slice.physics.velocity) - Vector3(prev_slice.physics.velocity)) / \
+                                (current_slice.game_seconds - prev_slice.game_seconds)
+        # The ball's Z acceleration will not be around -650 if it is bouncing.
+        if not (-600 > acceleration.z > -680):
+            bounces.append(current_slice)
+
+    return bounces
+
+
+def estimate_max_speed(car, cap_at_sonic: bool = True):
+    velocity_vec = Vector2(car.physics.velocity.x, car.physics.velocity.y)
+    velocity = velocity_vec.length
+    boost = float(car.boost)
+
+    return min(2200.0 if cap_at_sonic else 2300.0, 1410.0 + boost / 33.3 * 991.667)
+
+
+def get_impact(path: BallPrediction, car, ball_position: Vector3, budget: TickBudget = None) -> Optional[Tuple[Vector3, float]]:
+    car_position = Vector3(car.physics.location.x, car.physics.location.y, car.physics.location.z)
+    yaw = car.physics.rotation.yaw
+    forward_x, forward_y = math.cos(yaw), math.sin(yaw)
+    speed = Vector2(car.physics.velocity.x, car.physics.velocity.y).length
+    has_boost = car.boost > 0
+    for i in range(0, path.num_slices):
+        if budget is not None and i % 16 == 0 and budget.out_of_time("impact"):
+            return None  # Out of time, let the caller reuse an older impact
+        current_slice: Vector3 = Vector3(path.slices[i].physics.location.x, path.slices[i].physics.location.y, path.slices[i].physics.location.z)
+
+        offset = current_slice - car_position
+        distance = offset.length
+        reach = max(0.0, distance - 92.75) / distance if distance > 0 else 0
+        # In the car's frame, and mirrored when it's behind since Anarchy drives there backwards
+        x = (offset.x * forward_x + offset.y * forward_y) * reach
+        y = (offset.y * forward_x - offset.x * forward_y) * reach
+        t = (float(i) / 60)
+
+        # Boost only pushes forwards, so it's no help driving backwards
+        if arrival_time(abs(x), y, speed, has_boost and x >= 0) <= t:
+            return current_slice, t
+
+    return ball_position, 0 #Couldn't find a point of impact
@@ -1,10 +1,13 @@
+from array import array
 from dataclasses import dataclass
-from pathlib import Path
+from functools import lru_cache
 from typing import List, Tuple
-import tempfile
-import zipfile
+import struct
+import sys
+import time
 from rlbot.utils.rendering.rendering_manager import RenderingManager
 
+from utilities.assets import assets
 from utilities.vectors import Vector3
 
 @dataclass
@@ -20,51 +23,130 @@ class ColoredPolygonGroup:
     name: str
     polygons: List[Polygon]
     color: Color
+
+# Binary meshes, as stored in the asset bundle. All little endian, in this order:
+#   header     magic b"MESH", vertex, polygon, index and group counts (u32)
+#   groups     name (32 bytes), R, G, B, padding, first polygon (u32), polygon count (u32)
+#   vertices   x, y, z (f32) as written in the .obj
+#   indices    the vertex indices of every polygon, one after the other (u32)
+#   sizes      how many vertices each polygon has (u8)
+_MESH_HEADER = struct.Struct("<4sIIII")
+_MESH_GROUP = struct.Struct("<32sBBBxII")
+_MESH_MAGIC = b"MESH"
+
+
+def parse_obj(text: str) -> Tuple[List[Tuple[float, float, float]], List[Tuple[str, Tuple[int, int, int], List[List[int]]]]]:
+    """Reads the vertices, and the (name, color, polygons) groups, from a .obj file.
+    Each group has to be an object named like this: name_HEXVALUE, for example 'white_FFFFFF'"""
+    lines = text.splitlines()
+    vertices = list()
+    groups = list()
+    for line in lines:
+        if line.startswith("v "):
+            s = line.split(" ")
+            vertices.append((float(s[1]), float(s[2]), float(s[3])))
+        if line.startswith("o "):
+            data = line.split(" ")[1].split("_")
+            groups.append((data[0], tuple(int(data[1][i:i+2], 16) for i in (0, 2, 4)), list()))
+        if line.startswith("f "):
+            groups[-1][2].append([int(face.split("/")[0]) - 1 for face in line.split(" ")[1:]])
+    return vertices, groups
+
+
+def pack_mesh(text: str) -> bytes:
+    """Compiles a .obj file into the binary mesh format."""
+    vertices, groups = parse_obj(text)
+    polygons = [polygon for name, color, group_polygons in groups for polygon in group_polygons]
+    indices = [index for polygon in polygons for index in polygon]
+    parts = [_MESH_HEADER.pack(_MESH_MAGIC, len(vertices), len(polygons), len(indices), len(groups))]
+    first = 0
+    for name, (r, g, b), group_polygons in groups:
+        parts.append(_MESH_GROUP.pack(name.encode("utf-8"), r, g, b, first, len(group_polygons)))
+        first += len(group_polygons)
+    parts.append(struct.pack(f"<{3 * len(vertices)}f", *(value for vertex in vertices for value in vertex)))
+    parts.append(struct.pack(f"<{len(indices)}I", *indices))
+    parts.append(bytes(len(polygon) for polygon in polygons))
+    return b"".join(parts)
+
+
+def unpack_mesh(data: memoryview) -> Tuple[memoryview, memoryview, memoryview, List[Tuple[str, Tuple[int, int, int], int, int]]]:
+    """Splits a binary mesh into vertex, index and size views without copying them, and reads its (name, color, first, count) groups."""
+    magic, vertex_count, polygon_count, index_count, group_count = _MESH_HEADER.unpack_from(data, 0)
+    if magic != _MESH_MAGIC:
+        raise ValueError("Not a binary mesh")
+    position = _MESH_HEADER.size
+    groups = list()
+    for _ in range(group_count):
+        name, r, g, b, first, count = _MESH_GROUP.unpack_from(data, position)
+        groups.append((name.rstrip(b"\0").decode("utf-8"), (r, g, b), first, count))
+        position += _MESH_GROUP.size
+    vertices = data[position:position + 12 * vertex_count]
+    position += 12 * vertex_count
+    indices = data[position:position + 4 * index_count]
+    position += 4 * index_count
+    if sys.byteorder == "little":
+        vertices, indices = vertices.cast("f"), indices.cast("I")
+    else:
+        # Meshes are little endian, so big endian hosts get swapped copies instead of views
+        swapped = array("f"), array("I")
+        for values, raw in zip(swapped, (vertices, indices)):
+            values.frombytes(raw)
+            values.byteswap()
+        vertices, indices = (memoryview(values) for values in swapped)
+    sizes = data[position:position + polygon_count]
+    return vertices, indices, sizes, groups
+
+
+def mesh_to_obj(data: memoryview) -> str:
+    """Turns a binary mesh back into a .obj file, for editing."""
+    vertices, indices, sizes, groups = unpack_mesh(data)
+    lines = [f"v {vertices[i]} {vertices[i + 1]} {vertices[i + 2]}" for i in range(0, len(vertices), 3)]
+    index = 0
+    for name, (r, g, b), first, count in groups:
+        lines.append(f"o {name}_{r:02X}{g:02X}{b:02X}")
+        for polygon in range(first, first + count):
+            lines.append("f " + " ".join(str(indices[index + i] + 1) for i in range(sizes[polygon])))
+            index += sizes[polygon]
+    return "\n".join(lines) + "\n"
+
+
 class ColoredWireframe:
-    """Parses a .obj file and renders it inside the arena over time.
-    To give your mesh the correct colors, you have to make each differently colored part a separate object/group,
-    and name them like this: name_HEXVALUE, for example 'white_FFFFFF'"""
-    def __init__(self, file_path: str, scale: float=1, position: Vector3=Vector3(0, 0, 0)):
-        self.groups: List[ColoredPolygonGroup] = list()
-        self.scale = scale
-        self.position = position
+    """Renders a mesh inside the arena over time, one colored group after the other."""
+    def __init__(self, groups: List[ColoredPolygonGroup]):
+        self.groups: List[ColoredPolygonGroup] = groups
         self.polygons_rendered = 0
         self.current_color_group = 0
 
-        file = open(file_path)
-        lines = file.readlines()
+    @classmethod
+    def from_mesh(cls, data: memoryview, scale: float=1, position: Vector3=Vector3(0, 0, 0)) -> "ColoredWireframe":
+        vertex_data, indices, sizes, mesh_groups = unpack_mesh(data)
         vertices: List[Vector3] = list()
-        for line in lines:
-            if line.startswith("v "):
-                s = line.split(" ")
-                vertex = Vector3(-float(s[3]), float(s[1]), float(s[2])) * scale + position
-                vertices.append(vertex)
-        for line in lines:
-            if line.startswith("o "):
-                data = line.split(" ")[1].split("_")
-                rgb = tuple(int(data[1][i:i+2], 16) for i in (0, 2, 4))
-
-                self.groups.append(ColoredPolygonGroup(
-                    name=data[0],
-                    polygons=list(),
-                    color=Color(rgb[0], rgb[1], rgb[2])))
-            if line.startswith("f "):
-                s = line.split(" ")
-                polygon = Polygon(list())
-
-                for face in s[1:] + s[1:1]:
-                    vertex_index = int(face.split("/")[0]) - 1
-                    polygon.vertices.append(vertices[vertex_index])
-
-                self.groups[-1].polygons.append(polygon)
-
-    def render(self, renderer: RenderingManager, polygons_per_tick=100):
+        for i in range(0, len(vertex_data), 3):
+            vertex = Vector3(-vertex_data[i + 2], vertex_data[i], vertex_data[i + 1]) * scale + position
+            vertices.append(vertex)
+        groups = list()
+        index = 0
+        for name, (r, g, b), first, count in mesh_groups:
+            group = ColoredPolygonGroup(name=name, polygons=list(), color=Color(r, g, b))
+            for polygon in range(first, first + count):
+                size = sizes[polygon]
+                group.polygons.append(Polygon([vertices[indices[index + i]] for i in range(size)]))
+                index += size
+            groups.append(group)
+        return cls(groups)
+
+    def render(self, renderer: RenderingManager, polygons_per_tick=100, deadline: float = None) -> bool:
+        """Renders the next batch of polygons. If a deadline (in time.perf_counter seconds) is given,
+        the batch is cut short once it passes, and False is returned."""
         if self.current_color_group < len(self.groups):
             unique_group_name = str(self.polygons_rendered) + str(self.current_color_group)
             renderer.begin_rendering(unique_group_name)
             group: ColoredPolygonGroup = self.groups[self.current_color_group]
             color = renderer.create_color(255, group.color.R, group.color.G, group.color.B)
             for i in range(polygons_per_tick):
+                if deadline is not None and i % 10 == 0 and time.perf_counter() > deadline:
+                    renderer.end_rendering()
+                    return False
                 if self.polygons_rendered < len(group.polygons):
                     renderer.draw_polyline_3d(group.polygons[self.polygons_rendered].vertices, color)
                     self.polygons_rendered += 1
@@ -73,15 +155,15 @@ class ColoredWireframe:
                     self.current_color_group += 1
                     break
             renderer.end_rendering()
+        return True
+
+
+@lru_cache()
+def _load_groups(name: str) -> List[ColoredPolygonGroup]:
+    # Building the polygons is slow, and nothing changes them after, so every agent in the same process shares them
+    return ColoredWireframe.from_mesh(assets()[name], 70, Vector3(3500, 0, 0)).groups
 
 
-def unzip_and_make_mesh(zip_file: str, obj_file: str) -> ColoredWireframe:
-    """Extract a zip file into a temp directory, and create a ColoredMesh from a .obj file inside the archive.
-    This needs to be done in order to bypass the Anarchy line limit, because .obj is not a binary file."""
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        tmpdir = Path(tmpdirname)
-        try:
-            with zipfile.ZipFile(Path(__file__).absolute().parent / zip_file, 'r') as zip_ref: zip_ref.extractall(tmpdir)
-        except:
-            with zipfile.ZipFile(str(Path(__file__).absolute().parent / zip_file), 'r') as zip_ref: zip_ref.extractall(tmpdir)
-        return ColoredWireframe(tmpdir / obj_file, 70, Vector3(3500, 0, 0))
\ No newline at end of file
+def load_mesh(name: str) -> ColoredWireframe:
+    """Builds a ColoredWireframe from a mesh in the asset bundle, with its own place in the render."""
+    return ColoredWireframe(_load_groups(name))
@@ -0,0 +1,421 @@
+'''
+A simplified, headless stand-in for Rocket League, for tuning Anarchy offline.
+The physics are rough on purpose: cars drive on a flat floor with a speed dependent turning circle, can jump and dodge,
+and the ball bounces off the floor, walls and ceiling. That's enough to compare versions of the decision code
+against each other, not to predict how they will do in a real match.
+'''
+
+import ctypes
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from rlbot.agents.base_agent import BaseAgent, SimpleControllerState
+from rlbot.utils.structures.game_data_struct import GameTickPacket, FieldInfoPacket
+from rlbot.utils.structures.ball_prediction_struct import BallPrediction, Slice, MAX_SLICES
+
+from utilities.deadline import TickBudget
+from utilities.steering import max_curvature, throttle_acceleration
+from utilities.utils import clamp, clamp11, sign
+
+
+TICK_RATE: int = 60  # Ticks per second, the same as the ball prediction's slices
+_SUBSTEPS: int = 2
+_GRAVITY: float = -650
+_BALL_RADIUS: float = 92.75
+_CAR_RADIUS: float = 70  # The car's hitbox, rounded to a sphere
+_CAR_HEIGHT: float = 17.01
+_GOAL_HALF_WIDTH: float = 892.755
+_GOAL_HEIGHT: float = 642.775
+
+# Standard soccar boost pads: x, y, is_full_boost
+BOOST_PADS = [
+    (0, -4240, False), (-1792, -4184, False), (1792, -4184, False), (-3072, -4096, True), (3072, -4096, True),
+    (-940, -3308, False), (940, -3308, False), (0, -2816, False), (-3584, -2484, False), (3584, -2484, False),
+    (-1788, -2300, False), (1788, -2300, False), (-2048, -1036, False), (0, -1024, False), (2048, -1036, False),
+    (-3584, 0, True), (-1024, 0, False), (1024, 0, False), (3584, 0, True), (-2048, 1036, False),
+    (0, 1024, False), (2048, 1036, False), (-1788, 2300, False), (1788, 2300, False), (-3584, 2484, False),
+    (3584, 2484, False), (0, 2816, False), (-940, 3310, False), (940, 3308, False), (-3072, 4096, True),
+    (3072, 4096, True), (-1792, 4184, False), (1792, 4184, False), (0, 4240, False),
+]
+
+
+class SimBall:
+    def __init__(self, x: float, y: float, z: float, vx: float = 0, vy: float = 0, vz: float = 0) -> None:
+        self.x, self.y, self.z = x, y, z
+        self.vx, self.vy, self.vz = vx, vy, vz
+
+    def copy(self) -> "SimBall":
+        return SimBall(self.x, self.y, self.z, self.vx, self.vy, self.vz)
+
+    def step(self, dt: float) -> int:
+        """Moves the ball, returns the team that scored (0 or 1), or -1 if nobody did."""
+        self.vz += _GRAVITY * dt
+        drag = 1 - 0.0305 * dt
+        self.vx, self.vy, self.vz = self.vx * drag, self.vy * drag, self.vz * drag
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.z += self.vz * dt
+
+        if self.z < _BALL_RADIUS:
+            self.z = _BALL_RADIUS
+            if self.vz < 0:
+                self.vz *= -0.6
+                self.vx *= 0.85
+                self.vy *= 0.85
+        elif self.z > 2044 - _BALL_RADIUS and self.vz > 0:
+            self.z = 2044 - _BALL_RADIUS
+            self.vz *= -0.6
+        if abs(self.x) > 4096 - _BALL_RADIUS and self.vx * self.x > 0:
+            self.x = sign(self.x) * (4096 - _BALL_RADIUS)
+            self.vx *= -0.6
+        in_goal_mouth = abs(self.x) < _GOAL_HALF_WIDTH - _BALL_RADIUS and self.z < _GOAL_HEIGHT - _BALL_RADIUS
+        if abs(self.y) > 5120 - _BALL_RADIUS and not in_goal_mouth and self.vy * self.y > 0 and abs(self.y) < 5120:
+            self.y = sign(self.y) * (5120 - _BALL_RADIUS)
+            self.vy *= -0.6
+        if abs(self.y) > 5120 + _BALL_RADIUS:
+            return 0 if self.y > 0 else 1
+        return -1
+
+
+class SimCar:
+    def __init__(self, x: float, y: float, yaw: float, team: int, boost: float = 33) -> None:
+        self.x, self.y, self.z = x, y, _CAR_HEIGHT
+        self.vx, self.vy, self.vz = 0.0, 0.0, 0.0
+        self.pitch, self.yaw, self.roll = 0.0, yaw, 0.0
+        self.team: int = team
+        self.boost: float = boost
+        self.on_ground: bool = True
+        self.jumped: bool = False
+        self.double_jumped: bool = False
+        self.jump_time: float = 0
+        self.held_jump: bool = False
+
+    def copy(self) -> "SimCar":
+        car = SimCar(self.x, self.y, self.yaw, self.team, self.boost)
+        car.z, car.vx, car.vy, car.vz = self.z, self.vx, self.vy, self.vz
+        car.pitch, car.roll = self.pitch, self.roll
+        car.on_ground, car.jumped, car.double_jumped = self.on_ground, self.jumped, self.double_jumped
+        car.jump_time, car.held_jump = self.jump_time, self.held_jump
+        return car
+
+    @property
+    def speed(self) -> float:
+        return math.sqrt(self.vx ** 2 + self.vy ** 2 + self.vz ** 2)
+
+    def step(self, controls: SimpleControllerState, time: float, dt: float) -> None:
+        forward_x, forward_y = math.cos(self.yaw), math.sin(self.yaw)
+        boosting = controls.boost and self.boost > 0
+        if boosting:
+            self.boost = max(0.0, self.boost - 33.3 * dt)
+        pressed_jump = controls.jump and not self.held_jump
+        self.held_jump = controls.jump
+
+        if self.on_ground:
+            speed = self.vx * forward_x + self.vy * forward_y
+            throttle = clamp11(controls.throttle)
+            if boosting:
+                acceleration = 991.667 + throttle_acceleration(speed)
+            elif throttle * speed < 0:
+                acceleration = 3500 * sign(throttle)  # Braking
+            elif throttle != 0:
+                acceleration = throttle * throttle_acceleration(speed)
+            else:
+                acceleration = -sign(speed) * min(525, abs(speed) / dt)  # Coasting
+            speed = clamp(speed + acceleration * dt, -2300, 2300)
+            curvature = max_curvature(speed) * clamp11(controls.steer) * (1.5 if controls.handbrake else 1)
+            if controls.handbrake:
+                speed *= 1 - 0.5 * dt
+            self.yaw += curvature * speed * dt
+            self.vx, self.vy = math.cos(self.yaw) * speed, math.sin(self.yaw) * speed
+            if pressed_jump:
+                self.vz = 291.667
+                self.on_ground = False
+                self.jumped = True
+                self.jump_time = time
+        else:
+            self.vz += _GRAVITY * dt
+            self.pitch = clamp(self.pitch + clamp11(controls.pitch) * 5.5 * dt, -math.pi / 2, math.pi / 2)
+            if boosting:
+                self.vx += math.cos(self.pitch) * forward_x * 991.667 * dt
+                self.vy += math.cos(self.pitch) * forward_y * 991.667 * dt
+                self.vz += math.sin(self.pitch) * 991.667 * dt
+            if pressed_jump and self.jumped and not self.double_jumped and time - self.jump_time < 1.25:
+                self.double_jumped = True
+                forward, sideways = -clamp11(controls.pitch), clamp11(controls.roll + controls.yaw)
+                if abs(forward) + abs(sideways) > 0.1:
+                    # Dodge, the impulse goes in the direction of the stick
+                    length = math.hypot(forward, sideways)
+                    forward, sideways = forward / length, sideways / length
+                    self.vx += 500 * (forward * forward_x - sideways * forward_y)
+                    self.vy += 500 * (forward * forward_y + sideways * forward_x)
+                    self.vz = 0
+                else:
+                    self.vz += 291.667
+
+        speed = self.speed
+        if speed > 2300:
+            self.vx, self.vy, self.vz = (v * 2300 / speed for v in (self.vx, self.vy, self.vz))
+        self.x = clamp(self.x + self.vx * dt, -4096, 4096)
+        self.y = clamp(self.y + self.vy * dt, -5120, 5120)
+        self.z += self.vz * dt
+        if not self.on_ground and self.z <= _CAR_HEIGHT:
+            self.z, self.vz, self.pitch = _CAR_HEIGHT, 0, 0
+            self.on_ground = True
+            self.jumped = self.double_jumped = False
+
+
+class NullRenderer:
+    """Takes every rendering call and does nothing with it."""
+    def __getattr__(self, name: str) -> Callable:
+        return lambda *args, **kwargs: None
+
+
+@dataclass
+class Scenario:
+    name: str
+    ball: SimBall
+    car: SimCar
+    opponent: Optional[SimCar] = None
+    duration: float = 8
+
+
+@dataclass
+class Result:
+    scenario: str
+    ticks: int = 0
+    goals_for: int = 0
+    goals_against: int = 0
+    first_touch: float = math.inf  # Seconds until Anarchy first touched the ball
+    ball_progress: float = 0  # Average ball y towards the enemy goal, -1 to 1
+    errors: int = 0  # Ticks where get_output raised
+    error_types: List[str] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        """How well Anarchy played, leaving out errors. Ticks that raised froze the bot, so compare `errors` first."""
+        touch = 0 if math.isinf(self.first_touch) else 1 / (1 + self.first_touch)
+        return 5 * (self.goals_for - self.goals_against) + touch + self.ball_progress
+
+
+def kickoff(slot: int, opponent: bool = True) -> Scenario:
+    """Slots 0-4 are the blue spawns: diagonal left/right, off-centre left/right, and straight."""
+    spawns = [(-2048, -2560, math.pi / 4), (2048, -2560, 3 * math.pi / 4),
+              (-256, -3840, math.pi / 2), (256, -3840, math.pi / 2), (0, -4608, math.pi / 2)]
+    x, y, yaw = spawns[slot]
+    return Scenario(f"kickoff {slot}", SimBall(0, 0, _BALL_RADIUS), SimCar(x, y, yaw, 0),
+                    SimCar(-x, -y, yaw + math.pi, 1) if opponent else None, duration=6)
+
+
+def bouncing_ball(seed: int) -> Scenario:
+    rng = random.Random(seed)
+    ball = SimBall(rng.uniform(-2500, 2500), rng.uniform(-2000, 2000), rng.uniform(300, 1200),
+                   rng.uniform(-600, 600), rng.uniform(-600, 600), rng.uniform(0, 800))
+    car = SimCar(rng.uniform(-3000, 3000), rng.uniform(-4500, -2500), rng.uniform(0, math.pi), 0, rng.uniform(0, 100))
+    return Scenario(f"bouncing ball {seed}", ball, car, duration=8)
+
+
+def wall_ball(seed: int) -> Scenario:
+    rng = random.Random(seed)
+    side = rng.choice((-1, 1))
+    ball = SimBall(side * rng.uniform(2500, 3500), rng.uniform(-3000, 3000), _BALL_RADIUS,
+                   side * rng.uniform(800, 1600), rng.uniform(-400, 400), rng.uniform(0, 400))
+    car = SimCar(rng.uniform(-2000, 2000), rng.uniform(-4500, -2000), rng.uniform(0, math.pi), 0, rng.uniform(0, 100))
+    return Scenario(f"wall ball {seed}", ball, car, duration=8)
+
+
+def default_scenarios() -> List[Scenario]:
+    return ([kickoff(slot) for slot in range(5)] + [bouncing_ball(seed) for seed in range(4)]
+            + [wall_ball(seed) for seed in range(4)])
+
+
+def chase(car: SimCar, ball: SimBall) -> SimpleControllerState:
+    """A dumb opponent: drives straight at the ball and dodges into it."""
+    controls = SimpleControllerState()
+    angle = math.atan2(ball.y - car.y, ball.x - car.x) - car.yaw
+    angle = (angle + math.pi) % (2 * math.pi) - math.pi
+    controls.steer = clamp11(angle * 3)
+    controls.throttle = 1
+    controls.boost = abs(angle) < 0.3
+    close = math.hypot(ball.x - car.x, ball.y - car.y) < 500
+    controls.jump = close and (car.on_ground or not car.double_jumped)
+    controls.pitch = -1 if close else 0
+    return controls
+
+
+class Simulator:
+    """Runs one scenario against an agent, feeding it packets and ball predictions built from the simulated state.
+    The agent gets an unlimited tick budget unless `budget` is given."""
+    def __init__(self, agent: BaseAgent, scenario: Scenario, budget: TickBudget = None) -> None:
+        self.agent: BaseAgent = agent
+        self.scenario: Scenario = scenario
+        self.ball: SimBall = scenario.ball.copy()
+        self.cars: List[SimCar] = self.spawn_cars()
+        self.time: float = 0
+        self.ticks: int = 0
+        self.packet: GameTickPacket = GameTickPacket()
+        self.field_info: FieldInfoPacket = FieldInfoPacket()
+        self.ball_prediction: BallPrediction = BallPrediction()
+        self.pad_respawns: List[float] = [0.0] * len(BOOST_PADS)
+        self.goals: List[int] = [0, 0]
+        self.result: Result = Result(scenario.name)
+
+        # The ball only changes course when it's touched, so its path is simulated once per touch,
+        # and the prediction each tick is a window into it.
+        self.trajectory = (Slice * (MAX_SLICES + int(scenario.duration * TICK_RATE) + 1))()
+        self.trajectory_start: int = 0
+
+        self.field_info.num_boosts = len(BOOST_PADS)
+        for i, (x, y, full) in enumerate(BOOST_PADS):
+            self.field_info.boost_pads[i].location.x = x
+            self.field_info.boost_pads[i].location.y = y
+            self.field_info.boost_pads[i].location.z = 73 if full else 70
+            self.field_info.boost_pads[i].is_full_boost = full
+
+        # Plug the agent into the simulator instead of the framework
+        agent.get_field_info = lambda: self.field_info
+        agent.get_ball_prediction_struct = lambda: self.ball_prediction
+        agent.send_quick_chat = lambda team_only, quick_chat: None
+        agent._set_renderer(NullRenderer())
+        if hasattr(agent, "quick_chat_handler"):
+            agent.quick_chat_handler.handle_quick_chats = lambda packet: None  # Spam threads would outlive the run
+        if hasattr(agent, "telemetry"):
+            agent.telemetry.watch = lambda packet, index: None  # A sweep would fill the disk with dumps
+        if hasattr(agent, "budget"):
+            # Wall clock deadlines would make runs depend on machine load
+            agent.budget = budget if budget is not None else TickBudget(math.inf)
+        agent.initialize_agent()
+        self.predict()
+
+    def predict(self) -> None:
+        ball = self.ball.copy()
+        dt = 1 / TICK_RATE / _SUBSTEPS
+        for i in range(len(self.trajectory)):
+            physics = self.trajectory[i].physics
+            physics.location.x, physics.location.y, physics.location.z = ball.x, ball.y, ball.z
+            physics.velocity.x, physics.velocity.y, physics.velocity.z = ball.vx, ball.vy, ball.vz
+            self.trajectory[i].game_seconds = self.time + i / TICK_RATE
+            for _ in range(_SUBSTEPS):
+                ball.step(dt)
+        self.trajectory_start = self.ticks
+
+    def update_packet(self) -> None:
+        packet = self.packet
+        packet.game_info.seconds_elapsed = self.time
+        packet.game_info.is_round_active = True
+        physics = packet.game_ball.physics
+        physics.location.x, physics.location.y, physics.location.z = self.ball.x, self.ball.y, self.ball.z
+        physics.velocity.x, physics.velocity.y, physics.velocity.z = self.ball.vx, self.ball.vy, self.ball.vz
+
+        packet.num_cars = len(self.cars)
+        for i, car in enumerate(self.cars):
+            info = packet.game_cars[i]
+            info.physics.location.x, info.physics.location.y, info.physics.location.z = car.x, car.y, car.z
+            info.physics.velocity.x, info.physics.velocity.y, info.physics.velocity.z = car.vx, car.vy, car.vz
+            info.physics.rotation.pitch, info.physics.rotation.yaw, info.physics.rotation.roll = car.pitch, car.yaw, car.roll
+            info.has_wheel_contact = car.on_ground
+            info.jumped, info.double_jumped = car.jumped, car.double_jumped
+            info.is_super_sonic = car.speed > 2200
+            info.team = car.team
+            info.boost = int(car.boost)
+            info.score_info.goals = self.goals[car.team]
+            info.name = self.agent.name if i == self.agent.index else f"Opponent {i}"
+
+        packet.num_boost = len(BOOST_PADS)
+        for i, (x, y, full) in enumerate(BOOST_PADS):
+            packet.game_boosts[i].is_active = self.pad_respawns[i] <= self.time
+            # Seconds since the pad was picked up, like the game's timer
+            packet.game_boosts[i].timer = 0 if packet.game_boosts[i].is_active else self.time - (self.pad_respawns[i] - (10 if full else 4))
+
+        offset = self.ticks - self.trajectory_start
+        ctypes.memmove(ctypes.addressof(self.ball_prediction.slices), ctypes.addressof(self.trajectory[offset]),
+                       ctypes.sizeof(Slice) * MAX_SLICES)
+        self.ball_prediction.num_slices = MAX_SLICES
+
+    def pick_up_boost(self, car: SimCar) -> None:
+        for i, (x, y, full) in enumerate(BOOST_PADS):
+            if self.pad_respawns[i] <= self.time and car.z < 100 and math.hypot(car.x - x, car.y - y) < (208 if full else 144):
+                car.boost = 100 if full else min(100.0, car.boost + 12)
+                self.pad_respawns[i] = self.time + (10 if full else 4)
+
+    def touch(self, car: SimCar) -> bool:
+        dx, dy, dz = self.ball.x - car.x, self.ball.y - car.y, self.ball.z - (car.z + 20)
+        distance = math.sqrt(dx * dx + dy * dy + dz * dz)
+        if distance > _BALL_RADIUS + _CAR_RADIUS or distance == 0:
+            return False
+        nx, ny, nz = dx / distance, dy / distance, dz / distance
+        closing = (car.vx - self.ball.vx) * nx + (car.vy - self.ball.vy) * ny + (car.vz - self.ball.vz) * nz
+        if closing <= 0:
+            return False
+        impulse = closing * 1.5 + 250
+        self.ball.vx += nx * impulse
+        self.ball.vy += ny * impulse
+        self.ball.vz += max(nz, 0.1) * impulse
+        # Push the ball out of the car
+        overlap = _BALL_RADIUS + _CAR_RADIUS - distance
+        self.ball.x, self.ball.y, self.ball.z = self.ball.x + nx * overlap, self.ball.y + ny * overlap, self.ball.z + nz * overlap
+        return True
+
+    def spawn_cars(self) -> List[SimCar]:
+        # Copies, so the scenario can be played again from the same start
+        cars = [self.scenario.car] + ([self.scenario.opponent] if self.scenario.opponent is not None else [])
+        return [car.copy() for car in cars]
+
+    def reset_kickoff(self) -> None:
+        self.cars = self.spawn_cars()
+        self.ball = self.scenario.ball.copy()
+        self.ball.x = self.ball.y = 0
+        self.ball.vx = self.ball.vy = self.ball.vz = 0
+        self.predict()
+
+    def step(self) -> None:
+        self.update_packet()
+        try:
+            controls = self.agent.get_output(self.packet)
+            # The agent reuses its controller, so copy what it asked for before it changes
+            controls = SimpleControllerState(controls.steer, controls.throttle, controls.pitch, controls.yaw, controls.roll,
+                                             controls.jump, controls.boost, controls.handbrake)
+        except Exception as e:
+            # The framework logs exceptions and carries on, so the simulator does too
+            self.result.errors += 1
+            if type(e).__name__ not in self.result.error_types:
+                self.result.error_types.append(type(e).__name__)
+            controls = SimpleControllerState()
+
+        dt = 1 / TICK_RATE
+        all_controls = [controls] + [chase(car, self.ball) for car in self.cars[1:]]
+        touched = False
+        for car, car_controls in zip(self.cars, all_controls):
+            car.step(car_controls, self.time, dt)
+            self.pick_up_boost(car)
+        for i, car in enumerate(self.cars):
+            if self.touch(car):
+                touched = True
+                if i == self.agent.index and math.isinf(self.result.first_touch):
+                    self.result.first_touch = self.time
+
+        scorer = -1
+        for _ in range(_SUBSTEPS):
+            scorer = max(scorer, self.ball.step(dt / _SUBSTEPS))
+        self.time += dt
+        self.ticks += 1
+        if scorer >= 0:
+            self.goals[scorer] += 1
+            self.reset_kickoff()
+        elif touched:
+            self.predict()
+
+        team_sign = 1 if self.cars[self.agent.index].team == 0 else -1
+        self.result.ball_progress += team_sign * self.ball.y / 5120
+
+    def run(self) -> Result:
+        while self.time < self.scenario.duration:
+            self.step()
+        self.agent.retire()
+        team = self.cars[self.agent.index].team
+        self.result.ticks = self.ticks
+        self.result.goals_for = self.goals[team]
+        self.result.goals_against = self.goals[1 - team]
+        self.result.ball_progress /= max(self.ticks, 1)
+        return self.result
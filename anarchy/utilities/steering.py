@@ -0,0 +1,172 @@
+'''
+How fast a car turns and drives, and the arc-plus-line path model built on top of that.
+
+The tables are built once at import. Every query after that is an index or a bisect into them,
+so they are cheap enough to call for every ball prediction slice.
+'''
+
+import math
+from bisect import bisect_left
+from typing import List, Tuple
+
+import numpy as np
+
+from utilities.utils import clamp, clamp11, sign
+
+
+MAX_SPEED: float = 2300
+BOOST_ACCELERATION: float = 991.667
+# Curvature (1 / turning radius) at full lock, by speed
+_CURVATURES = [(0, 0.0069), (500, 0.00398), (1000, 0.00235), (1500, 0.001375), (1750, 0.0011), (2300, 0.00088)]
+
+SPEED_STEP: int = 10
+ANGLE_BINS: int = 128  # Over a full circle
+ANGLE_STEP: float = 2 * math.pi / ANGLE_BINS
+MIN_CORNER_SPEED: float = 500  # Corners inside the turning circle are taken at least this fast, powersliding if need be
+STEER_TIME: float = 0.25  # Steer as if the car should be lined up this many seconds from now, so it doesn't overshoot
+_DT: float = 1 / 120
+_DRIVE_SECONDS: float = 6
+
+
+def max_curvature(speed: float) -> float:
+    speed = clamp(abs(speed), 0, MAX_SPEED)
+    for (s0, k0), (s1, k1) in zip(_CURVATURES, _CURVATURES[1:]):
+        if speed <= s1:
+            return k0 + (k1 - k0) * (speed - s0) / (s1 - s0)
+    return _CURVATURES[-1][1]
+
+
+def throttle_acceleration(speed: float) -> float:
+    speed = abs(speed)
+    if speed < 1400:
+        return 1600 - 1440 * speed / 1400
+    if speed < 1410:
+        return 16 * (1410 - speed)
+    return 0
+
+
+def _turn_tables() -> Tuple[List[List[float]], List[List[float]]]:
+    """Time to turn each angle bin at full lock and full throttle, and the speed at the end of it, for each starting speed."""
+    speed_points, curvature_points = zip(*_CURVATURES)
+    speed = np.arange(0, MAX_SPEED + SPEED_STEP, SPEED_STEP, dtype=float)
+    heading = np.zeros_like(speed)
+    headings, speeds = [heading], [speed]
+    while heading.min() < 2 * math.pi:
+        acceleration = np.where(speed < 1400, 1600 - 1440 * speed / 1400, np.where(speed < 1410, 16 * (1410 - speed), 0))
+        speed = speed + acceleration * _DT
+        heading = heading + np.interp(speed, speed_points, curvature_points) * speed * _DT
+        headings.append(heading)
+        speeds.append(speed)
+    headings, speeds = np.array(headings), np.array(speeds)
+    times = np.arange(len(headings)) * _DT
+    angles = np.arange(ANGLE_BINS + 1) * ANGLE_STEP
+    turn_time = [np.interp(angles, headings[:, i], times).tolist() for i in range(headings.shape[1])]
+    turn_speed = [np.interp(angles, headings[:, i], speeds[:, i]).tolist() for i in range(headings.shape[1])]
+    return turn_time, turn_speed
+
+
+def _drive_table(boost: bool) -> Tuple[List[float], List[float]]:
+    """Speed and distance covered each physics tick when driving straight from a standstill."""
+    top_speed = MAX_SPEED if boost else 1410
+    speed, distance = 0.0, 0.0
+    speeds, distances = [speed], [distance]
+    for _ in range(int(_DRIVE_SECONDS / _DT)):
+        acceleration = throttle_acceleration(speed) + (BOOST_ACCELERATION if boost else 0)
+        speed = min(top_speed, speed + acceleration * _DT)
+        distance += speed * _DT
+        speeds.append(speed)
+        distances.append(distance)
+    return speeds, distances
+
+
+CURVATURE: List[float] = [max_curvature(speed) for speed in range(0, MAX_SPEED + SPEED_STEP, SPEED_STEP)]
+_NEGATIVE_CURVATURE: List[float] = [-k for k in CURVATURE]  # Ascending, for bisecting
+TURN_TIME, TURN_SPEED = _turn_tables()
+_DRIVE = {boost: _drive_table(boost) for boost in (False, True)}
+
+
+def _speed_index(speed: float) -> int:
+    return min(int(abs(speed) / SPEED_STEP + 0.5), len(CURVATURE) - 1)
+
+
+def turning_radius(speed: float) -> float:
+    return 1 / CURVATURE[_speed_index(speed)]
+
+
+def yaw_rate(speed: float) -> float:
+    """How fast the car turns at full lock, in radians per second."""
+    return CURVATURE[_speed_index(speed)] * abs(speed)
+
+
+def corner_speed(radius: float) -> float:
+    """The fastest the car can go and still turn on a circle of this radius."""
+    i = bisect_left(_NEGATIVE_CURVATURE, -1 / max(radius, 1))
+    return MAX_SPEED if i >= len(CURVATURE) else max(0, i - 1) * SPEED_STEP
+
+
+def turn_time(speed: float, angle: float) -> Tuple[float, float]:
+    """How long turning `angle` radians at full lock takes from `speed`, and how fast the car is going afterwards."""
+    i = _speed_index(speed)
+    j = min(int(angle / ANGLE_STEP + 0.5), ANGLE_BINS)
+    return TURN_TIME[i][j], TURN_SPEED[i][j]
+
+
+def drive_time(distance: float, speed: float, boost: bool) -> float:
+    """How long driving `distance` in a straight line takes from `speed`, at full throttle."""
+    speeds, distances = _DRIVE[boost]
+    top_speed = speeds[-1]
+    if speed >= top_speed:
+        return distance / max(speed, 1)
+    start = bisect_left(speeds, speed)
+    target = distances[start] + distance
+    if target > distances[-1]:
+        return (len(distances) - 1 - start) * _DT + (target - distances[-1]) / top_speed
+    return (bisect_left(distances, target, start) - start) * _DT
+
+
+def arc_line(x: float, y: float, speed: float) -> Tuple[float, float, float]:
+    """
+    The quickest path to a point `x` ahead of the car and `y` to the side: turn at full lock, then drive straight.
+    If the point is inside the turning circle, the arc is on the tighter circle through the point, which means slowing down.
+
+    :return: The angle turned, the radius turned on and the length of the straight
+    """
+    y = abs(y)
+    radius = turning_radius(speed)
+    centre_y = y - radius
+    d = math.hypot(x, centre_y)
+    if d < radius:
+        radius = (x * x + y * y) / (2 * y)
+        angle = 2 * math.atan2(y, x)
+        return angle, radius, 0
+    angle = math.atan2(centre_y, x) + math.asin(radius / d)
+    if angle < -1e-6:
+        angle += 2 * math.pi
+    return max(angle, 0), radius, math.sqrt(d * d - radius * radius)
+
+
+def path_length(x: float, y: float, speed: float) -> float:
+    angle, radius, line = arc_line(x, y, speed)
+    return angle * radius + line
+
+
+def arrival_time(x: float, y: float, speed: float, boost: bool) -> float:
+    """How long the car takes to get to a point `x` ahead of it and `y` to the side, along the arc-plus-line path."""
+    angle, radius, line = arc_line(x, y, speed)
+    if line == 0 and angle > 0:
+        # Inside the turning circle, slow down enough to make the corner
+        return angle * radius / max(corner_speed(radius), MIN_CORNER_SPEED)
+    seconds, end_speed = turn_time(speed, angle)
+    return seconds + drive_time(line, end_speed, boost)
+
+
+def steer_toward(angle: float, distance: float, speed: float) -> Tuple[float, bool]:
+    """
+    Steers towards a point `angle` radians off the nose and `distance` away.
+
+    :return: The steer input, and whether to powerslide. Sliding only pays off when the point is inside the turning circle and well off to the side.
+    """
+    rate = yaw_rate(speed)
+    steer = clamp11(angle / (rate * STEER_TIME)) if rate > 0 else sign(angle)
+    inside = abs(angle) > 0.8 and distance < 2 * turning_radius(speed) * abs(math.sin(angle))
+    return steer, inside and speed > 600
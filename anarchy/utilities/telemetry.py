@@ -0,0 +1,160 @@
+'''
+Records what Anarchy saw and decided over the last few seconds, and writes it to a file when something bad happens.
+
+Read a dump with `read_dump`, or summarise one from the command line (from the anarchy folder):
+    python -m utilities.telemetry telemetry/conceded_123.tlm
+'''
+
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from rlbot.agents.base_agent import SimpleControllerState
+from rlbot.utils.structures.game_data_struct import GameTickPacket, PlayerInfo, BallInfo
+
+from utilities.vectors import Vector2, Vector3
+
+
+FIELDS = ("time",
+          "car_x", "car_y", "car_z", "car_vx", "car_vy", "car_vz", "car_pitch", "car_yaw", "car_roll", "car_boost",
+          "ball_x", "ball_y", "ball_z", "ball_vx", "ball_vy", "ball_vz",
+          "destination_x", "destination_y", "impact_x", "impact_y", "impact_z", "impact_time",
+          "wait", "backwards", "avoid_own_goal",
+          "throttle", "steer", "pitch", "yaw", "roll", "jump", "boost", "handbrake",
+          "wheel_contact", "maneuver", "maneuver_frame")
+_WIDTH = len(FIELDS)
+_MAGIC = b"ANTL"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHHI")  # magic, version, field count, row count
+_NAN = float("nan")
+DUMP_DIR = Path(__file__).absolute().parent.parent / "telemetry"
+
+
+class Telemetry:
+    """A ring buffer of the last `seconds` of ticks. All the storage is allocated up front,
+    and appending a tick only overwrites floats in place."""
+    def __init__(self, seconds: float = 10, tick_rate: int = 120) -> None:
+        self.seconds: float = seconds
+        self.capacity: int = int(seconds * tick_rate)
+        self.data: array = array("f", bytes(4 * self.capacity * _WIDTH))
+        self.next_row: int = 0
+        self.count: int = 0
+        self.prev_goals_against: Optional[int] = None  # None until the first packet, which may come mid-match
+        self.prev_demolished: bool = False
+
+    def append(self, game_time: float, car: PlayerInfo, ball: BallInfo, destination: Vector2, impact: Vector3,
+               impact_time: float, wait: bool, backwards: bool, avoid_own_goal: bool, controller: SimpleControllerState,
+               maneuver: int = -1, maneuver_frame: int = -1) -> None:
+        """`maneuver` is the registry id of the maneuver playing (see utilities/maneuvers.py), or -1."""
+        d = self.data
+        i = self.next_row * _WIDTH
+        d[i] = game_time
+        physics = car.physics
+        d[i + 1] = physics.location.x
+        d[i + 2] = physics.location.y
+        d[i + 3] = physics.location.z
+        d[i + 4] = physics.velocity.x
+        d[i + 5] = physics.velocity.y
+        d[i + 6] = physics.velocity.z
+        d[i + 7] = physics.rotation.pitch
+        d[i + 8] = physics.rotation.yaw
+        d[i + 9] = physics.rotation.roll
+        d[i + 10] = car.boost
+        physics = ball.physics
+        d[i + 11] = physics.location.x
+        d[i + 12] = physics.location.y
+        d[i + 13] = physics.location.z
+        d[i + 14] = physics.velocity.x
+        d[i + 15] = physics.velocity.y
+        d[i + 16] = physics.velocity.z
+        d[i + 17] = destination.x if destination is not None else _NAN
+        d[i + 18] = destination.y if destination is not None else _NAN
+        d[i + 19] = impact.x
+        d[i + 20] = impact.y
+        d[i + 21] = impact.z
+        d[i + 22] = impact_time
+        d[i + 23] = wait
+        d[i + 24] = backwards
+        d[i + 25] = avoid_own_goal
+        d[i + 26] = controller.throttle
+        d[i + 27] = controller.steer
+        d[i + 28] = controller.pitch
+        d[i + 29] = controller.yaw
+        d[i + 30] = controller.roll
+        d[i + 31] = controller.jump
+        d[i + 32] = controller.boost
+        d[i + 33] = controller.handbrake
+        d[i + 34] = car.has_wheel_contact
+        d[i + 35] = maneuver
+        d[i + 36] = maneuver_frame
+        self.next_row = (self.next_row + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def watch(self, packet: GameTickPacket, index: int) -> None:
+        """The event hook: dumps the buffer when Anarchy's team concedes or Anarchy gets demolished."""
+        car = packet.game_cars[index]
+        # The team score, since own goals don't count towards any opponent's goals
+        goals_against = packet.teams[1 - car.team].score
+        if self.prev_goals_against is None:
+            # First packet: only changes from here on count, not goals or a demo from before Anarchy started
+            self.prev_goals_against = goals_against
+            self.prev_demolished = car.is_demolished
+        if goals_against > self.prev_goals_against:
+            self.dump(DUMP_DIR / f"conceded_{int(time.time())}.tlm", self.seconds)
+        if car.is_demolished and not self.prev_demolished:
+            self.dump(DUMP_DIR / f"demolished_{int(time.time())}.tlm", self.seconds)
+        self.prev_goals_against = goals_against
+        self.prev_demolished = car.is_demolished
+
+    def dump(self, path: Path, seconds: float = None) -> None:
+        """Writes the last `seconds` (default: everything in the buffer) to a file, oldest tick first."""
+        rows = self.count
+        start = (self.next_row - rows) % self.capacity
+        if seconds is not None and rows > 0:
+            latest = self.data[((self.next_row - 1) % self.capacity) * _WIDTH]
+            while rows > 0 and self.data[start * _WIDTH] < latest - seconds:
+                start = (start + 1) % self.capacity
+                rows -= 1
+
+        data = self.data
+        if sys.byteorder != "little":
+            # Dumps are little endian, so swap a copy rather than the live buffer
+            data = array("f", data)
+            data.byteswap()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        view = memoryview(data).cast("B")
+        row_bytes = 4 * _WIDTH
+        with open(path, "wb") as f:
+            names = ",".join(FIELDS).encode("ascii")
+            f.write(_HEADER.pack(_MAGIC, _VERSION, _WIDTH, rows))
+            f.write(struct.pack("<H", len(names)) + names)
+            end = start + rows
+            f.write(view[start * row_bytes:min(end, self.capacity) * row_bytes])
+            if end > self.capacity:
+                f.write(view[:(end - self.capacity) * row_bytes])
+
+
+def read_dump(path) -> Dict[str, np.ndarray]:
+    """Reads a dump into a dict of numpy arrays, one per field, with a row per tick."""
+    with open(path, "rb") as f:
+        magic, version, width, rows = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} telemetry dump")
+        names = f.read(struct.unpack("<H", f.read(2))[0]).decode("ascii").split(",")
+        table = np.frombuffer(f.read(), dtype="<f4", count=rows * width).reshape(rows, width)
+    return {name: table[:, i] for i, name in enumerate(names)}
+
+
+if __name__ == "__main__":
+    for dump_path in sys.argv[1:]:
+        columns = read_dump(dump_path)
+        times = columns["time"]
+        print(f"{dump_path}: {len(times)} ticks" + (f", {times[0]:.2f}s to {times[-1]:.2f}s" if len(times) else ""))
+        for name, column in columns.items():
+            if len(column):
+                print(f"  {name:>16}  min {column.min():10.2f}  max {column.max():10.2f}  last {column[-1]:10.2f}")
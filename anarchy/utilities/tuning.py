@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class Tuning:
+    """The hand-picked constants of Anarchy's decision making, kept in one place so sweep.py can search over them."""
+    shadow_divisor: float = 2.9  # How far to stay behind the ball, as a fraction of the y distance to it
+    offset_divisor: float = 3.4  # How far to line up behind the ball, as a fraction of the distance to it
+    own_goal_offset: float = 100  # How far to go around the ball when hitting it would score an own goal
+    own_goal_offset_per_second: float = 200  # Extra distance to go around it per second until the impact
+    bounce_window: float = 0.5  # How long before the impact a bounce can be and still be waited for
+    aerial_min_time: float = 2.5  # Don't aerial unless the ball is this many seconds away
+    aerial_min_height: float = 500  # Don't aerial unless the impact is this high
+    aerial_max_speed: float = 1000  # Don't aerial when driving faster than this
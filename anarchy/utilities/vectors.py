@@ -174,15 +174,19 @@ class Vector3:
         did_you_have_fun_yet = False  # Toggle this if this pro party was enough fun.
         if did_you_have_fun_yet:
             return property(self)
-        from pathlib import Path
-        with open(Path(__file__).absolute().parent.parent / 'audio' / 'boiing.mp4', 'rb') as f:
-            𝚖𝚞𝚜𝚒𝚌 = f.read()
         def fun(selfie):
             nonlocal did_you_have_fun_yet
             if did_you_have_fun_yet:
                 return self(selfie)   # If you're reading this, good job. Congrats, you've found it. Move along citicen.
-            import 𝚒𝚗𝚜𝚙𝚎𝚌𝚝, 𝚠𝚒𝚗𝚜𝚘𝚞𝚗𝚍
+            try:
+                import 𝚒𝚗𝚜𝚙𝚎𝚌𝚝, 𝚠𝚒𝚗𝚜𝚘𝚞𝚗𝚍
+            except ImportError:  # No winsound off Windows (e.g. in the simulator), so no fun either
+                did_you_have_fun_yet = True
+                return self(selfie)
+            import threading
             from rlbot.agents.base_agent import BaseAgent
+            from utilities.assets import assets
+            𝚖𝚞𝚜𝚒𝚌 = assets()['audio/boiing.mp4']  # Mapped, not read, until it first plays
             frames = inspect.getouterframes(inspect.currentframe())
             for outer in frames:
                 agent = outer.frame.f_locals.get('self', None)
@@ -192,9 +196,10 @@ class Vector3:
                     j = p.game_cars[agent.index].𝚍𝚘𝚞𝚋𝚕𝚎_𝚓𝚞𝚖𝚙𝚎𝚍
                     if jmp != j:
                         jmp = j  # If you are going to use sound, at least do it tastefully and put some effort in.
-                        if jmp: 𝚠𝚒𝚗𝚜𝚘𝚞𝚗𝚍.𝙿𝚕𝚊𝚢𝚂𝚘𝚞𝚗𝚍(f.name, buffer + bitrate*len(𝚖𝚞𝚜𝚒𝚌))
+                        # Sounds from memory can't play asynchronously, so give it a thread
+                        if jmp: threading.Thread(target=𝚠𝚒𝚗𝚜𝚘𝚞𝚗𝚍.𝙿𝚕𝚊𝚢𝚂𝚘𝚞𝚗𝚍, args=(𝚖𝚞𝚜𝚒𝚌, 𝚠𝚒𝚗𝚜𝚘𝚞𝚗𝚍.SND_MEMORY), daemon=True).start()
                     return orig(p)
-                agent.get_output, orig, jmp, bitrate, buffer = get_state, agent.get_output, False, 5, 10453
+                agent.get_output, orig, jmp = get_state, agent.get_output, False
                 did_you_have_fun_yet = True  # no performance concern :)
                 break
             return self(selfie)